@@ -1,4 +1,5 @@
 from logging.config import fileConfig
+import os
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
@@ -22,6 +23,15 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+# The application URL names an async driver, migrations run on its sync counterpart
+SYNC_DRIVERS = {"+aiosqlite": "", "+asyncpg": "+psycopg2"}
+
+if "DATABASE_URL" in os.environ:
+    url = os.environ["DATABASE_URL"]
+    for async_driver, sync_driver in SYNC_DRIVERS.items():
+        url = url.replace(async_driver, sync_driver, 1)
+    config.set_main_option("sqlalchemy.url", url)
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
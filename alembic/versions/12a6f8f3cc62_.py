@@ -19,6 +19,10 @@ depends_on: Union[str, Sequence[str], None] = None
 
 
 def upgrade() -> None:
+    # Column names are case-insensitive on SQLite, adding board_json would clash
+    if op.get_bind().dialect.name == "sqlite":
+        op.alter_column("rooms", "board_JSON", new_column_name="board_json")
+        return
     # ### commands auto generated by Alembic - please adjust! ###
     op.add_column('rooms', sa.Column('board_json', sa.JSON(), nullable=False))
     op.drop_column('rooms', 'board_JSON')
@@ -26,6 +30,9 @@ def upgrade() -> None:
 
 
 def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        op.alter_column("rooms", "board_json", new_column_name="board_JSON")
+        return
     # ### commands auto generated by Alembic - please adjust! ###
     op.add_column('rooms', sa.Column('board_JSON', postgresql.JSON(astext_type=sa.Text()), autoincrement=False, nullable=False))
     op.drop_column('rooms', 'board_json')
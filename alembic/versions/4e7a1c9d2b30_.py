@@ -0,0 +1,34 @@
+"""room board size and win length
+
+Revision ID: 4e7a1c9d2b30
+Revises: 12a6f8f3cc62
+Create Date: 2026-10-18 10:12:41.503217
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4e7a1c9d2b30"
+down_revision: Union[str, None] = "12a6f8f3cc62"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "rooms", sa.Column("size", sa.Integer(), server_default="3", nullable=False)
+    )
+    op.add_column(
+        "rooms",
+        sa.Column("win_length", sa.Integer(), server_default="3", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("rooms", "win_length")
+    op.drop_column("rooms", "size")
@@ -0,0 +1,37 @@
+"""per-room symbols
+
+Revision ID: 5f1b7c3e9a28
+Revises: d3c81f0e6a52
+Create Date: 2026-10-18 13:05:12.640281
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5f1b7c3e9a28"
+down_revision: Union[str, None] = "d3c81f0e6a52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("rooms", sa.Column("first_symbol", sa.String(1), nullable=True))
+    op.add_column("rooms", sa.Column("second_symbol", sa.String(1), nullable=True))
+    # Seats were always X for the first player and O for the second once full
+    op.execute(
+        "UPDATE rooms SET first_symbol = 'X', second_symbol = 'O' "
+        "WHERE second_player_id IS NOT NULL"
+    )
+    with op.batch_alter_table("players") as batch_op:
+        batch_op.drop_column("symbol")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("players") as batch_op:
+        batch_op.add_column(sa.Column("symbol", sa.String(), nullable=True))
+    op.drop_column("rooms", "second_symbol")
+    op.drop_column("rooms", "first_symbol")
@@ -0,0 +1,40 @@
+"""player stats
+
+Revision ID: 7c2e9f4a1d63
+Revises: e8a4d2c6b913
+Create Date: 2026-10-18 14:31:07.552914
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c2e9f4a1d63"
+down_revision: Union[str, None] = "e8a4d2c6b913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Ratings depend on the order of games, so counting starts from this revision
+    op.create_table(
+        "player_stats",
+        sa.Column("player_id", sa.Uuid(), nullable=False),
+        sa.Column("wins", sa.Integer(), nullable=False),
+        sa.Column("losses", sa.Integer(), nullable=False),
+        sa.Column("draws", sa.Integer(), nullable=False),
+        sa.Column("rating", sa.Double(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["player_id"],
+            ["players.player_id"],
+        ),
+        sa.PrimaryKeyConstraint("player_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("player_stats")
@@ -0,0 +1,102 @@
+"""binary board encoding
+
+Revision ID: 9b2f5e8a7c14
+Revises: 4e7a1c9d2b30
+Create Date: 2026-10-18 11:02:17.884120
+
+"""
+
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "9b2f5e8a7c14"
+down_revision: Union[str, None] = "4e7a1c9d2b30"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+# Mirrors app.codec at the time of writing, migrations must not follow later changes
+SYMBOLS = ("X", "O")
+
+rooms = sa.table(
+    "rooms",
+    sa.column("room_id", sa.Uuid()),
+    sa.column("size", sa.Integer()),
+    sa.column("board_json", sa.JSON()),
+    sa.column("board", sa.LargeBinary()),
+    sa.column("move_count", sa.SmallInteger()),
+)
+
+
+def _encode(fields: list[list[str]], size: int) -> tuple[bytes, int]:
+    masks = [0] * len(SYMBOLS)
+    for row, cols in enumerate(fields):
+        for col, symbol in enumerate(cols):
+            if symbol in SYMBOLS:
+                masks[SYMBOLS.index(symbol)] |= 1 << (row * size + col)
+    if not any(masks):
+        return b"", 0
+    width = (size * size + 7) // 8
+    data = b"".join(mask.to_bytes(width, "little") for mask in masks)
+    return data, sum(mask.bit_count() for mask in masks)
+
+
+def _decode(data: bytes, size: int) -> list[list[str]]:
+    fields = [[" "] * size for _ in range(size)]
+    width = (size * size + 7) // 8
+    for i, symbol in enumerate(SYMBOLS):
+        mask = int.from_bytes(data[i * width : (i + 1) * width], "little")
+        for cell in range(size * size):
+            if mask >> cell & 1:
+                fields[cell // size][cell % size] = symbol
+    return fields
+
+
+def _convert(select: sa.Select, convert) -> None:
+    connection = op.get_bind()
+    result = connection.execution_options(stream_results=True).execute(select)
+    for rows in result.partitions(BATCH_SIZE):
+        connection.execute(
+            rooms.update().where(rooms.c.room_id == sa.bindparam("_room_id")),
+            [convert(row) for row in rows],
+        )
+
+
+def upgrade() -> None:
+    op.add_column("rooms", sa.Column("board", sa.LargeBinary(), nullable=True))
+    op.add_column(
+        "rooms",
+        sa.Column("move_count", sa.SmallInteger(), server_default="0", nullable=False),
+    )
+
+    def convert(row) -> dict:
+        # Older rows hold the grid as a JSON encoded string inside the JSON column
+        fields = row.board_json
+        if isinstance(fields, str):
+            fields = json.loads(fields)
+        board, move_count = _encode(fields, row.size)
+        return {"_room_id": row.room_id, "board": board, "move_count": move_count}
+
+    _convert(sa.select(rooms.c.room_id, rooms.c.size, rooms.c.board_json), convert)
+    with op.batch_alter_table("rooms") as batch_op:
+        batch_op.alter_column("board", nullable=False)
+        batch_op.drop_column("board_json")
+
+
+def downgrade() -> None:
+    op.add_column("rooms", sa.Column("board_json", sa.JSON(), nullable=True))
+
+    def convert(row) -> dict:
+        fields = _decode(row.board, row.size)
+        return {"_room_id": row.room_id, "board_json": json.dumps(fields)}
+
+    _convert(sa.select(rooms.c.room_id, rooms.c.size, rooms.c.board), convert)
+    with op.batch_alter_table("rooms") as batch_op:
+        batch_op.alter_column("board_json", nullable=False)
+        batch_op.drop_column("move_count")
+        batch_op.drop_column("board")
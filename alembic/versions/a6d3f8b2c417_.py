@@ -0,0 +1,60 @@
+"""room updated_at and rooms archive
+
+Revision ID: a6d3f8b2c417
+Revises: 7c2e9f4a1d63
+Create Date: 2026-10-18 16:02:44.318650
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "a6d3f8b2c417"
+down_revision: Union[str, None] = "7c2e9f4a1d63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "rooms", sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.execute("UPDATE rooms SET updated_at = COALESCE(finished_at, created_at)")
+    with op.batch_alter_table("rooms") as batch_op:
+        batch_op.alter_column(
+            "updated_at", nullable=False, server_default=sa.func.now()
+        )
+    op.create_index("ix_rooms_updated_at", "rooms", ["updated_at"])
+
+    op.create_table(
+        "rooms_archive",
+        sa.Column("room_id", sa.Uuid(), nullable=False),
+        sa.Column("first_player_id", sa.Uuid(), nullable=False),
+        sa.Column("second_player_id", sa.Uuid(), nullable=False),
+        sa.Column("winner_player_id", sa.Uuid(), nullable=True),
+        sa.Column("size", sa.SmallInteger(), nullable=False),
+        sa.Column("win_length", sa.SmallInteger(), nullable=False),
+        sa.Column("board", sa.LargeBinary(), nullable=False),
+        sa.Column("move_count", sa.SmallInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("room_id"),
+    )
+    op.create_index(
+        "ix_rooms_archive_first_player_id", "rooms_archive", ["first_player_id"]
+    )
+    op.create_index(
+        "ix_rooms_archive_second_player_id", "rooms_archive", ["second_player_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rooms_archive_second_player_id", table_name="rooms_archive")
+    op.drop_index("ix_rooms_archive_first_player_id", table_name="rooms_archive")
+    op.drop_table("rooms_archive")
+    op.drop_index("ix_rooms_updated_at", table_name="rooms")
+    with op.batch_alter_table("rooms") as batch_op:
+        batch_op.drop_column("updated_at")
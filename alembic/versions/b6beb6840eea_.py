@@ -57,5 +57,6 @@ def downgrade() -> None:
     # ### commands auto generated by Alembic - please adjust! ###
     op.drop_table("rooms")
     op.drop_table("players")
-    op.execute("DROP TYPE activestate")
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP TYPE activestate")
     # ### end Alembic commands ###
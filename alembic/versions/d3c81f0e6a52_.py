@@ -0,0 +1,39 @@
+"""moves log
+
+Revision ID: d3c81f0e6a52
+Revises: 9b2f5e8a7c14
+Create Date: 2026-10-18 12:20:45.117903
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d3c81f0e6a52"
+down_revision: Union[str, None] = "9b2f5e8a7c14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "moves",
+        sa.Column("room_id", sa.Uuid(), nullable=False),
+        sa.Column("ply", sa.SmallInteger(), nullable=False),
+        sa.Column("player_id", sa.Uuid(), nullable=False),
+        sa.Column("cell", sa.SmallInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["player_id"],
+            ["players.player_id"],
+        ),
+        sa.PrimaryKeyConstraint("room_id", "ply"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("moves")
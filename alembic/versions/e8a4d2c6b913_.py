@@ -0,0 +1,157 @@
+"""room status, winner and lifecycle timestamps
+
+Revision ID: e8a4d2c6b913
+Revises: 5f1b7c3e9a28
+Create Date: 2026-10-18 13:48:30.215407
+
+"""
+
+from typing import Sequence, Union
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e8a4d2c6b913"
+down_revision: Union[str, None] = "5f1b7c3e9a28"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+game_status = sa.Enum("WAITING", "ACTIVE", "FINISHED", name="gamestatus")
+
+rooms = sa.table(
+    "rooms",
+    sa.column("room_id", sa.Uuid()),
+    sa.column("first_player_id", sa.Uuid()),
+    sa.column("second_player_id", sa.Uuid()),
+    sa.column("size", sa.Integer()),
+    sa.column("win_length", sa.Integer()),
+    sa.column("board", sa.LargeBinary()),
+    sa.column("status", game_status),
+    sa.column("winner_player_id", sa.Uuid()),
+    sa.column("created_at", sa.DateTime(timezone=True)),
+)
+
+
+def _has_line(mask: int, size: int, win_length: int) -> bool:
+    for row in range(size):
+        for col in range(size):
+            for row_step, col_step in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_row = row + row_step * (win_length - 1)
+                end_col = col + col_step * (win_length - 1)
+                if not (0 <= end_row < size and 0 <= end_col < size):
+                    continue
+                if all(
+                    mask >> ((row + i * row_step) * size + col + i * col_step) & 1
+                    for i in range(win_length)
+                ):
+                    return True
+    return False
+
+
+def _winner(row) -> tuple[bool, uuid.UUID | None]:
+    """Whether the packed board is decided and by whom, mirrors compare_board_states"""
+    if not row.board:
+        return False, None
+    width = (row.size * row.size + 7) // 8
+    first = int.from_bytes(row.board[:width], "little")
+    second = int.from_bytes(row.board[width : 2 * width], "little")
+    if _has_line(first, row.size, row.win_length):
+        return True, row.first_player_id
+    if (first | second).bit_count() == row.size * row.size:
+        return True, None
+    if _has_line(second, row.size, row.win_length):
+        return True, row.second_player_id
+    return False, None
+
+
+def upgrade() -> None:
+    game_status.create(op.get_bind(), checkfirst=True)
+    op.add_column(
+        "rooms",
+        sa.Column("status", game_status, server_default="WAITING", nullable=False),
+    )
+    op.add_column("rooms", sa.Column("winner_player_id", sa.Uuid(), nullable=True))
+    # SQLite cannot add a column with a non-constant default, so fill it in first
+    op.add_column(
+        "rooms", sa.Column("created_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.add_column(
+        "rooms", sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.execute(rooms.update().values(created_at=sa.func.now()))
+    with op.batch_alter_table("rooms") as batch_op:
+        batch_op.alter_column(
+            "created_at", nullable=False, server_default=sa.func.now()
+        )
+        batch_op.create_foreign_key(
+            "rooms_winner_player_id_fkey",
+            "players",
+            ["winner_player_id"],
+            ["player_id"],
+        )
+
+    # Finish times of older games are unknown and stay empty
+    connection = op.get_bind()
+    connection.execute(
+        rooms.update()
+        .where(rooms.c.second_player_id.is_not(None))
+        .values(status="ACTIVE")
+    )
+    result = connection.execution_options(stream_results=True).execute(
+        sa.select(
+            rooms.c.room_id,
+            rooms.c.first_player_id,
+            rooms.c.second_player_id,
+            rooms.c.size,
+            rooms.c.win_length,
+            rooms.c.board,
+        ).where(rooms.c.second_player_id.is_not(None))
+    )
+    for rows in result.partitions(BATCH_SIZE):
+        finished = []
+        for row in rows:
+            decided, winner = _winner(row)
+            if decided:
+                finished.append({"_room_id": row.room_id, "winner_player_id": winner})
+        if finished:
+            connection.execute(
+                rooms.update()
+                .where(rooms.c.room_id == sa.bindparam("_room_id"))
+                .values(status="FINISHED"),
+                finished,
+            )
+
+    active = sa.text("status <> 'FINISHED'")
+    history = sa.text("status = 'FINISHED'")
+    for seat in ("first", "second"):
+        op.create_index(
+            f"ix_rooms_{seat}_player_active",
+            "rooms",
+            [f"{seat}_player_id"],
+            postgresql_where=active,
+            sqlite_where=active,
+        )
+        op.create_index(
+            f"ix_rooms_{seat}_player_history",
+            "rooms",
+            [f"{seat}_player_id", "finished_at"],
+            postgresql_where=history,
+            sqlite_where=history,
+        )
+
+
+def downgrade() -> None:
+    for seat in ("first", "second"):
+        op.drop_index(f"ix_rooms_{seat}_player_history", table_name="rooms")
+        op.drop_index(f"ix_rooms_{seat}_player_active", table_name="rooms")
+    with op.batch_alter_table("rooms") as batch_op:
+        batch_op.drop_constraint("rooms_winner_player_id_fkey", type_="foreignkey")
+        batch_op.drop_column("finished_at")
+        batch_op.drop_column("created_at")
+        batch_op.drop_column("winner_player_id")
+        batch_op.drop_column("status")
+    game_status.drop(op.get_bind(), checkfirst=True)
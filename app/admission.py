@@ -0,0 +1,117 @@
+"""Admission control for the room endpoints, checked before a session is opened.
+
+Requests are rate limited by token buckets per client IP and per player_id in the
+body, and the number of handlers running at once is capped so they never queue for a
+database connection. Anything over a limit is rejected right away with 429.
+"""
+
+from collections import OrderedDict
+import os
+import time
+from typing import AsyncIterator, Hashable
+import uuid
+
+from fastapi import HTTPException, Request
+from starlette import status
+
+from app.db import MAX_OVERFLOW, POOL_SIZE
+
+PLAYER_RATE = float(os.environ.get("RATE_LIMIT_PLAYER", 10))
+PLAYER_BURST = float(os.environ.get("RATE_LIMIT_PLAYER_BURST", 20))
+IP_RATE = float(os.environ.get("RATE_LIMIT_IP", 50))
+IP_BURST = float(os.environ.get("RATE_LIMIT_IP_BURST", 100))
+# By default as many handlers as the pool has connections
+MAX_CONCURRENCY = int(os.environ.get("MAX_CONCURRENCY", POOL_SIZE + MAX_OVERFLOW))
+
+
+class RateLimiter:
+    """Token bucket per key, refilled lazily on access.
+
+    A key idle long enough to refill its bucket is forgotten, since a fresh bucket is
+    identical, so memory only grows with the keys that are currently active."""
+
+    def __init__(self, rate: float, burst: float, capacity: int = 100000) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._capacity = capacity
+        self._idle = burst / rate
+        # key -> (tokens, last update), least recently used first
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()
+
+    def _evict_idle(self, now: float) -> None:
+        while self._buckets:
+            _, updated = next(iter(self._buckets.values()))
+            if now - updated < self._idle and len(self._buckets) <= self._capacity:
+                break
+            self._buckets.popitem(last=False)
+
+    def allow(self, key: Hashable) -> bool:
+        now = time.monotonic()
+        self._evict_idle(now)
+        tokens, updated = self._buckets.pop(key, (self._burst, now))
+        tokens = min(self._burst, tokens + (now - updated) * self._rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        return allowed
+
+
+class ConcurrencyLimiter:
+    """Non-blocking cap on handlers in flight, a full limiter rejects instead of waiting"""
+
+    def __init__(self, limit: int) -> None:
+        self._limit = limit
+        self._active = 0
+
+    def try_acquire(self) -> bool:
+        if self._active >= self._limit:
+            return False
+        self._active += 1
+        return True
+
+    def release(self) -> None:
+        self._active -= 1
+
+
+player_limiter = RateLimiter(PLAYER_RATE, PLAYER_BURST)
+ip_limiter = RateLimiter(IP_RATE, IP_BURST)
+concurrency_limiter = ConcurrencyLimiter(MAX_CONCURRENCY)
+
+
+def _reject(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": "1"},
+    )
+
+
+async def _player_id(request: Request) -> str | None:
+    # FastAPI has already read the body, the parsed JSON is cached on the request
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    if not isinstance(body, dict) or not isinstance(body.get("player_id"), str):
+        return None
+    # Every spelling of the same UUID has to share one bucket
+    try:
+        return str(uuid.UUID(body["player_id"]))
+    except ValueError:
+        return None
+
+
+async def admit(request: Request) -> AsyncIterator[None]:
+    """Route dependency, declared on the decorator so it runs before get_session"""
+    if request.client is not None and not ip_limiter.allow(request.client.host):
+        raise _reject("Too many requests from this address")
+    player_id = await _player_id(request)
+    if player_id is not None and not player_limiter.allow(player_id):
+        raise _reject("Too many requests for this player")
+    if not concurrency_limiter.try_acquire():
+        raise _reject("The server is busy")
+    try:
+        yield
+    finally:
+        concurrency_limiter.release()
@@ -0,0 +1,118 @@
+"""Vectorized outcome evaluation over stored rooms, for offline analytics.
+
+Rooms, and the finished games app.reaper moved to the archive, are streamed in
+chunks, decoded from their packed boards straight into NumPy arrays and decided with
+the same rules as Room.compare_board_states, so memory stays bounded by the chunk
+size however many rooms are stored:
+
+    python -m app.analytics --chunk-size 50000
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+import json
+from typing import AsyncIterator, Sequence
+import uuid
+
+import numpy as np
+from sqlalchemy import select
+
+from app.db import Session
+from app.models.archive import ArchivedRoom
+from app.models.room import Room, WinnerStates
+
+# Index of every outcome code returned by evaluate
+OUTCOMES = (
+    WinnerStates.NONE,
+    WinnerStates.FIRST,
+    WinnerStates.SECOND,
+    WinnerStates.STALEMATE,
+)
+
+CHUNK_SIZE = 10000
+
+
+def unpack(boards: Sequence[bytes], size: int) -> np.ndarray:
+    """Packed boards as a (rooms, 2, size, size) bool array of X and O cells"""
+    width = (size * size + 7) // 8
+    # Empty boards are stored without any bytes
+    raw = b"".join(board or bytes(2 * width) for board in boards)
+    packed = np.frombuffer(raw, dtype=np.uint8).reshape(len(boards), 2, width)
+    cells = np.unpackbits(packed, axis=2, bitorder="little")[:, :, : size * size]
+    return cells.reshape(len(boards), 2, size, size).astype(bool)
+
+
+def has_line(cells: np.ndarray, win_length: int) -> np.ndarray:
+    """Whether each (..., size, size) grid holds win_length in a row"""
+    size = cells.shape[-1]
+    span = size - win_length + 1
+    rows = cells[..., :, :span].copy()
+    cols = cells[..., :span, :].copy()
+    diagonal = cells[..., :span, :span].copy()
+    anti = cells[..., :span, win_length - 1 :].copy()
+    for i in range(1, win_length):
+        rows &= cells[..., :, i : i + span]
+        cols &= cells[..., i : i + span, :]
+        diagonal &= cells[..., i : i + span, i : i + span]
+        anti &= cells[..., i : i + span, win_length - 1 - i : size - i]
+    return (
+        rows.any(axis=(-2, -1))
+        | cols.any(axis=(-2, -1))
+        | diagonal.any(axis=(-2, -1))
+        | anti.any(axis=(-2, -1))
+    )
+
+
+def evaluate(boards: Sequence[bytes], size: int, win_length: int) -> np.ndarray:
+    """Outcome code of every board, indexes into OUTCOMES"""
+    cells = unpack(boards, size)
+    wins = has_line(cells, win_length)
+    full = (cells[:, 0] | cells[:, 1]).all(axis=(-2, -1))
+    # Same precedence as Room.compare_board_states
+    return np.select(
+        [wins[:, 0], full, wins[:, 1]],
+        [
+            OUTCOMES.index(WinnerStates.FIRST),
+            OUTCOMES.index(WinnerStates.STALEMATE),
+            OUTCOMES.index(WinnerStates.SECOND),
+        ],
+        OUTCOMES.index(WinnerStates.NONE),
+    ).astype(np.int8)
+
+
+async def evaluate_rooms(
+    chunk_size: int = CHUNK_SIZE,
+) -> AsyncIterator[tuple[list[uuid.UUID], np.ndarray]]:
+    """Streams (room ids, outcome codes) chunk by chunk through a server-side cursor"""
+    async with Session() as session:
+        for table in (Room, ArchivedRoom):
+            result = await session.stream(
+                select(
+                    table.room_id, table.size, table.win_length, table.board
+                ).execution_options(yield_per=chunk_size)
+            )
+            async for rows in result.partitions():
+                groups: dict[tuple[int, int], list] = {}
+                for row in rows:
+                    groups.setdefault((row.size, row.win_length), []).append(row)
+                for (size, win_length), group in groups.items():
+                    boards = [row.board for row in group]
+                    outcomes = evaluate(boards, size, win_length)
+                    yield [row.room_id for row in group], outcomes
+
+
+async def count_outcomes(chunk_size: int = CHUNK_SIZE) -> Counter[WinnerStates]:
+    totals = np.zeros(len(OUTCOMES), dtype=np.int64)
+    async for _, outcomes in evaluate_rooms(chunk_size):
+        totals += np.bincount(outcomes, minlength=len(OUTCOMES))
+    return Counter(dict(zip(OUTCOMES, totals.tolist())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    counts = asyncio.run(count_outcomes(args.chunk_size))
+    print(json.dumps({state.value: count for state, count in counts.items()}))
@@ -1,7 +1,7 @@
 from enum import Enum
+from functools import cache
 import json
 from app.exc import IncorrectInput, InvalidPlay
-from app.player import Player
 
 
 class BoardStates(str, Enum):
@@ -10,58 +10,141 @@ class BoardStates(str, Enum):
     STALEMATE = "STALEMATE"
 
 
-class Board:
-    def __init__(self, fields: str) -> None:
-        self._fields = fields
+SIZE = 3
+WIN_LENGTH = 3
+MAX_SIZE = 19
+EMPTY = " "
 
-    @property
-    def fields(self) -> list[list[str]]:
-        result: list[list[str]] = json.loads(self._fields)
-        return result
 
-    def edit_field(self, symbol: str, row: int, col: int) -> list[list[str]]:
-        board = self.fields
-        if row < 1 or col < 1:
-            raise IncorrectInput("The input was a zero or a negative number")
-        try:
-            if board[row - 1][col - 1] == " ":
-                board[row - 1][col - 1] = symbol
-                return board
-            else:
-                raise InvalidPlay("A used field was chosen")
-        except IndexError:
-            raise IncorrectInput("The chosen indexes were invalid")
+class Geometry:
+    """Bit layout of a size x size board where win_length in a row wins.
+
+    Cells are indexed row * stride + col with one always empty padding column per row,
+    so shifting a mask along a row or a diagonal never wraps onto the next row.
+    """
+
+    def __init__(self, size: int, win_length: int) -> None:
+        self.size = size
+        self.win_length = win_length
+        self.stride = size + 1
+        self.full = 0
+        for row in range(size):
+            self.full |= ((1 << size) - 1) << (row * self.stride)
+        # Horizontal, vertical, diagonal and anti-diagonal steps
+        self.directions = (1, self.stride, self.stride + 1, self.stride - 1)
 
-    def check_victory(self, player: Player) -> bool:
-        symbol = player.symbol
+    def cell(self, row: int, col: int) -> int:
+        return row * self.stride + col
 
-        for row in self.fields:
-            if all(col == symbol for col in row):
-                print(f"{player.name} wins, a full row!")
+    def position(self, cell: int) -> tuple[int, int]:
+        return divmod(cell, self.stride)
+
+    def has_line(self, mask: int) -> bool:
+        for step in self.directions:
+            line = mask
+            for i in range(1, self.win_length):
+                line &= mask >> (i * step)
+                if not line:
+                    break
+            if line:
                 return True
+        return False
 
-        for col in range(0, 3):
-            if all(self.fields[i][col] == symbol for i in range(3)):
-                print(f"{player.name} wins, a full column!")
+    def has_line_through(self, mask: int, cell: int) -> bool:
+        """Like has_line, but only looks at the four lines crossing cell"""
+        for step in self.directions:
+            count = 1
+            i = cell - step
+            while count < self.win_length and i >= 0 and mask >> i & 1:
+                count += 1
+                i -= step
+            i = cell + step
+            while count < self.win_length and mask >> i & 1:
+                count += 1
+                i += step
+            if count >= self.win_length:
                 return True
+        return False
 
-        if all(self.fields[i][i] == symbol for i in range(3)):
-            print(f"{player.name} wins, a full diagonal!")
-            return True
 
-        if (
-            self.fields[0][2] == symbol
-            and self.fields[1][1] == symbol
-            and self.fields[2][0] == symbol
-        ):
-            print(f"{player.name} wins, a full diagonal!")
-            return True
+@cache
+def geometry(size: int = SIZE, win_length: int = WIN_LENGTH) -> Geometry:
+    return Geometry(size, win_length)
 
-        return False
+
+class Board:
+    """Board kept as one bitmask per symbol, JSON is only produced on demand"""
+
+    def __init__(
+        self,
+        boards: dict[str, int] | None = None,
+        size: int = SIZE,
+        win_length: int = WIN_LENGTH,
+    ) -> None:
+        self._boards: dict[str, int] = dict(boards) if boards else {}
+        self._geometry = geometry(size, win_length)
+
+    @classmethod
+    def from_json(
+        cls, fields: str, size: int = SIZE, win_length: int = WIN_LENGTH
+    ) -> "Board":
+        layout = geometry(size, win_length)
+        boards: dict[str, int] = {}
+        for row, cols in enumerate(json.loads(fields)):
+            for col, symbol in enumerate(cols):
+                if symbol != EMPTY:
+                    bit = 1 << layout.cell(row, col)
+                    boards[symbol] = boards.get(symbol, 0) | bit
+        return cls(boards, size, win_length)
+
+    def to_json(self) -> str:
+        return json.dumps(self.fields)
+
+    @property
+    def size(self) -> int:
+        return self._geometry.size
+
+    @property
+    def win_length(self) -> int:
+        return self._geometry.win_length
+
+    def mask(self, symbol: str) -> int:
+        return self._boards.get(symbol, 0)
+
+    @property
+    def occupied(self) -> int:
+        result = 0
+        for mask in self._boards.values():
+            result |= mask
+        return result
+
+    @property
+    def fields(self) -> list[list[str]]:
+        size = self._geometry.size
+        result = [[EMPTY] * size for _ in range(size)]
+        for symbol, mask in self._boards.items():
+            while mask:
+                row, col = self._geometry.position((mask & -mask).bit_length() - 1)
+                result[row][col] = symbol
+                mask &= mask - 1
+        return result
+
+    def edit_field(self, symbol: str, row: int, col: int) -> bool:
+        """Places symbol and returns whether it completed a line"""
+        if row < 1 or col < 1:
+            raise IncorrectInput("The input was a zero or a negative number")
+        if row > self._geometry.size or col > self._geometry.size:
+            raise IncorrectInput("The chosen indexes were invalid")
+        cell = self._geometry.cell(row - 1, col - 1)
+        bit = 1 << cell
+        if self.occupied & bit:
+            raise InvalidPlay("A used field was chosen")
+        mask = self._boards.get(symbol, 0) | bit
+        self._boards[symbol] = mask
+        return self._geometry.has_line_through(mask, cell)
+
+    def check_victory(self, symbol: str) -> bool:
+        return self._geometry.has_line(self._boards.get(symbol, 0))
 
     def check_stalemate(self) -> bool:
-        for row in self.fields:
-            for col in row:
-                if col == " ":
-                    return False
-        return True
+        return self.occupied == self._geometry.full
@@ -0,0 +1,298 @@
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import logging
+import time
+from typing import AsyncIterator
+import uuid
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import joinedload
+
+from app.db import Session, write_session
+from app.models.move import Move
+from app.models.room import Room
+
+logger = logging.getLogger(__name__)
+
+# Columns a move can change, everything else is written by the routers directly
+STATE_COLUMNS = (
+    "board",
+    "move_count",
+    "active_player_state",
+    "status",
+    "winner_player_id",
+    "finished_at",
+    "updated_at",
+)
+
+
+@dataclass
+class _Entry:
+    room: Room
+    touched: float
+    dirty: bool = False
+    # Move log rows written in the same transaction as the room itself
+    moves: list[dict] = field(default_factory=list)
+
+
+class RoomCache:
+    """Hot rooms kept in memory, moves are written back to the rooms table in batches"""
+
+    def __init__(
+        self, capacity: int = 4096, ttl: float = 300.0, flush_interval: float = 1.0
+    ) -> None:
+        self._capacity = capacity
+        self._ttl = ttl
+        self._flush_interval = flush_interval
+        self._entries: OrderedDict[uuid.UUID, _Entry] = OrderedDict()
+        self._loading: dict[uuid.UUID, asyncio.Future[Room | None]] = {}
+        # Rooms being changed in the database directly, reads wait until they are done
+        self._held: dict[uuid.UUID, asyncio.Event] = {}
+        self._flush_lock = asyncio.Lock()
+
+    def __contains__(self, room_id: uuid.UUID) -> bool:
+        return room_id in self._entries or room_id in self._held
+
+    async def _wait_released(self, room_id: uuid.UUID) -> None:
+        held = self._held.get(room_id)
+        while held is not None:
+            await held.wait()
+            held = self._held.get(room_id)
+
+    async def get(self, room_id: uuid.UUID) -> Room | None:
+        await self._wait_released(room_id)
+        entry = self._entries.get(room_id)
+        if entry is not None:
+            entry.touched = time.monotonic()
+            self._entries.move_to_end(room_id)
+            return entry.room
+
+        # Concurrent misses share one load so no move is applied to a stale copy
+        loading = self._loading.get(room_id)
+        if loading is None:
+            loading = self._loading[room_id] = asyncio.ensure_future(
+                self._fill(room_id)
+            )
+        # A cancelled caller must not cancel the load the others are waiting on
+        return await asyncio.shield(loading)
+
+    async def _fill(self, room_id: uuid.UUID) -> Room | None:
+        try:
+            room = await self._load(room_id)
+            if room is not None:
+                self._entries[room_id] = _Entry(room, time.monotonic())
+                await self._evict_overflow()
+            return room
+        finally:
+            del self._loading[room_id]
+
+    async def get_many(self, room_ids: list[uuid.UUID]) -> dict[uuid.UUID, Room]:
+        """Like get, but every missing room is loaded by a single query"""
+        unique = list(dict.fromkeys(room_ids))
+        for room_id in unique:
+            await self._wait_released(room_id)
+        missing = [
+            room_id
+            for room_id in unique
+            if room_id not in self._entries and room_id not in self._loading
+        ]
+        if missing:
+            loop = asyncio.get_running_loop()
+            futures = {room_id: loop.create_future() for room_id in missing}
+            self._loading.update(futures)
+            await asyncio.shield(asyncio.ensure_future(self._fill_many(futures)))
+
+        result: dict[uuid.UUID, Room] = {}
+        now = time.monotonic()
+        for room_id in unique:
+            entry = self._entries.get(room_id)
+            if entry is not None:
+                entry.touched = now
+                self._entries.move_to_end(room_id)
+                result[room_id] = entry.room
+            elif room_id in self._loading:
+                room = await asyncio.shield(self._loading[room_id])
+                if room is not None:
+                    result[room_id] = room
+        await self._evict_overflow()
+        return result
+
+    async def _fill_many(
+        self, futures: dict[uuid.UUID, asyncio.Future[Room | None]]
+    ) -> None:
+        try:
+            loaded = await self._load_many(list(futures))
+        except BaseException as e:
+            for future in futures.values():
+                future.set_exception(e)
+            raise
+        finally:
+            for room_id in futures:
+                del self._loading[room_id]
+        now = time.monotonic()
+        for room in loaded:
+            self._entries[room.room_id] = _Entry(room, now)
+        for room_id, future in futures.items():
+            entry = self._entries.get(room_id)
+            future.set_result(None if entry is None else entry.room)
+
+    async def _load(self, room_id: uuid.UUID) -> Room | None:
+        rooms = await self._load_many([room_id])
+        return rooms[0] if rooms else None
+
+    async def _load_many(self, room_ids: list[uuid.UUID]) -> list[Room]:
+        async with Session() as session:
+            result = await session.execute(
+                select(Room)
+                .where(Room.room_id.in_(room_ids))
+                .options(
+                    joinedload(Room.first_player, innerjoin=True),
+                    joinedload(Room.second_player),
+                )
+            )
+            rooms = list(result.scalars())
+            for room in rooms:
+                session.expunge(room)
+            return rooms
+
+    def mark_dirty(self, room: Room) -> _Entry:
+        entry = self._entries.get(room.room_id)
+        if entry is None:
+            # Evicted while the move was being applied, keep it until written back
+            entry = self._entries[room.room_id] = _Entry(room, time.monotonic())
+        entry.dirty = True
+        return entry
+
+    def record_move(self, room: Room, player_id: uuid.UUID, row: int, col: int) -> None:
+        """Marks the room dirty and queues the move that was just applied to it"""
+        self.mark_dirty(room).moves.append(
+            {
+                "room_id": room.room_id,
+                "ply": room.move_count,
+                "player_id": player_id,
+                "cell": (row - 1) * room.size + col - 1,
+                "created_at": datetime.now(timezone.utc),
+            }
+        )
+
+    async def flush(self, room_ids: list[uuid.UUID] | None = None) -> None:
+        async with self._flush_lock:
+            entries = [
+                entry
+                for entry in (
+                    self._entries.values()
+                    if room_ids is None
+                    else filter(None, map(self._entries.get, room_ids))
+                )
+                if entry.dirty
+            ]
+            await self._write(entries)
+
+    async def _write(self, entries: list[_Entry]) -> None:
+        """Moves are acknowledged before this runs, the rows are only written here
+        because app.lease makes this process the single owner of its rooms"""
+        if not entries:
+            return
+        rows = []
+        moves: list[list[dict]] = []
+        for entry in entries:
+            # Cleared before awaiting, a move made during the write marks it again
+            entry.dirty = False
+            row = {"room_id": entry.room.room_id}
+            for column in STATE_COLUMNS:
+                row[column] = getattr(entry.room, column)
+            rows.append(row)
+            moves.append(entry.moves)
+            entry.moves = []
+        try:
+            async with write_session() as session:
+                pending = [move for room_moves in moves for move in room_moves]
+                if pending:
+                    await session.execute(insert(Move), pending)
+                await session.execute(update(Room), rows)
+                await session.commit()
+        except BaseException:
+            for entry, room_moves in zip(entries, moves):
+                entry.dirty = True
+                entry.moves[:0] = room_moves
+            raise
+
+    async def evict(self, room_id: uuid.UUID) -> None:
+        """Writes the room back if needed and drops it, so the next read hits the database"""
+        await self.flush([room_id])
+        self._entries.pop(room_id, None)
+
+    @asynccontextmanager
+    async def hold(self, room_id: uuid.UUID) -> AsyncIterator[None]:
+        """Keeps the room out of the cache while the block changes its row directly,
+        reads wait for the block and then load the committed row"""
+        await self._wait_released(room_id)
+        released = self._held[room_id] = asyncio.Event()
+        try:
+            loading = self._loading.get(room_id)
+            if loading is not None:
+                # A load already under way would cache the row about to change
+                await asyncio.wait([loading])
+            await self.evict(room_id)
+            yield
+        finally:
+            self._entries.pop(room_id, None)
+            del self._held[room_id]
+            released.set()
+
+    def discard(self, room_ids: list[uuid.UUID]) -> None:
+        """Drops rooms that no longer exist without writing them back"""
+        for room_id in room_ids:
+            self._entries.pop(room_id, None)
+
+    async def _evict_overflow(self) -> None:
+        evicted: list[_Entry] = []
+        while len(self._entries) > self._capacity:
+            evicted.append(self._entries.popitem(last=False)[1])
+        await self._flush_evicted(evicted)
+
+    async def _evict_expired(self) -> None:
+        deadline = time.monotonic() - self._ttl
+        evicted: list[_Entry] = []
+        while self._entries:
+            room_id, entry = next(iter(self._entries.items()))
+            if entry.touched > deadline:
+                break
+            evicted.append(self._entries.pop(room_id))
+        await self._flush_evicted(evicted)
+
+    async def _flush_evicted(self, evicted: list[_Entry]) -> None:
+        evicted = [entry for entry in evicted if entry.dirty]
+        if not evicted:
+            return
+        try:
+            async with self._flush_lock:
+                await self._write(evicted)
+        except BaseException:
+            # Keep unwritten rooms around, the next flush retries them
+            for entry in evicted:
+                self._entries.setdefault(entry.room.room_id, entry)
+            raise
+
+    async def run(self) -> None:
+        """Background write-behind loop, started with the application"""
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+                await self._evict_expired()
+            except Exception:
+                logger.exception("Failed to write back cached rooms")
+
+    async def release(self) -> None:
+        """Writes back and forgets every room so another process can own them"""
+        await self.flush()
+        self._entries.clear()
+
+    async def close(self) -> None:
+        await self.release()
+
+
+room_cache = RoomCache()
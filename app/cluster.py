@@ -0,0 +1,7 @@
+"""Settings shared by app.dispatch and the worker processes it starts"""
+
+import os
+
+# Set by app.dispatch on its workers, the /cluster endpoints only exist when it is
+CLUSTER_SECRET = os.environ.get("CLUSTER_SECRET")
+SECRET_HEADER = "X-Cluster-Secret"
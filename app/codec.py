@@ -0,0 +1,41 @@
+from app.board import Board, geometry
+
+# Storage order of the symbol masks
+SYMBOLS = ("X", "O")
+
+
+def _width(size: int) -> int:
+    return (size * size + 7) // 8
+
+
+def encode_board(board: Board) -> bytes:
+    """Packs the board as one dense row-major bitmask per symbol, X first then O"""
+    if not board.occupied:
+        return b""
+    layout = geometry(board.size, board.win_length)
+    row_mask = (1 << board.size) - 1
+    width = _width(board.size)
+    data = b""
+    for symbol in SYMBOLS:
+        mask = board.mask(symbol)
+        dense = 0
+        for row in range(board.size):
+            dense |= (mask >> (row * layout.stride) & row_mask) << (row * board.size)
+        data += dense.to_bytes(width, "little")
+    return data
+
+
+def decode_board(data: bytes, size: int, win_length: int) -> Board:
+    layout = geometry(size, win_length)
+    boards: dict[str, int] = {}
+    if data:
+        row_mask = (1 << size) - 1
+        width = _width(size)
+        for i, symbol in enumerate(SYMBOLS):
+            dense = int.from_bytes(data[i * width : (i + 1) * width], "little")
+            mask = 0
+            for row in range(size):
+                mask |= (dense >> (row * size) & row_mask) << (row * layout.stride)
+            if mask:
+                boards[symbol] = mask
+    return Board(boards, size, win_length)
@@ -0,0 +1,463 @@
+"""Room-affinity dispatcher in front of several app.main worker processes.
+
+Every request under /rooms/{room_id} is consistently hashed on the room id to one
+worker, so the worker's room cache is the only copy of a live room and its moves are
+applied one after another without database locks. Everything else, including the
+process-wide matchmaking queue and the leaderboard, goes to the first worker. Games
+finished on the other workers are sent to it as well:
+
+    python -m app.dispatch --workers 4 --port 8000
+
+Sending SIGUSR1 to the dispatcher starts one more worker and rebalances the ring,
+live WebSocket and SSE subscribers are disconnected then and reconnect to the new
+owner. WebSockets are relayed with the websockets package, without it they are
+refused and clients should use the SSE stream.
+"""
+
+import argparse
+import asyncio
+from bisect import bisect, insort
+import hashlib
+import json
+import logging
+import os
+import re
+import secrets
+import signal
+import subprocess
+import sys
+from typing import Iterable
+import uuid
+
+import httpx
+from starlette.types import Message, Receive, Scope, Send
+
+try:
+    from websockets.asyncio.client import ClientConnection
+    from websockets.asyncio.client import connect as websocket_connect
+    from websockets.exceptions import ConnectionClosed, InvalidHandshake
+except ImportError:
+    websocket_connect = None
+
+from app.cluster import SECRET_HEADER
+
+logger = logging.getLogger(__name__)
+
+# Points per worker on the ring, more points spread rooms more evenly
+REPLICAS = 64
+
+ROOM_PATH = re.compile(r"^/rooms/([0-9a-fA-F-]{36})(?:/|$)")
+BATCH_PATH = "/rooms/moves"
+
+# Close codes a peer reports but must never send, mapped to ones that can be sent
+RESERVED_CLOSE_CODES = {1005: 1000, 1006: 1011, 1015: 1011}
+
+# Connection-level headers that must not be forwarded by a proxy
+HOP_HEADERS = {
+    b"connection",
+    b"keep-alive",
+    b"proxy-authenticate",
+    b"proxy-authorization",
+    b"te",
+    b"trailer",
+    b"transfer-encoding",
+    b"upgrade",
+    b"host",
+    b"content-length",
+}
+
+
+def _hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing with virtual nodes, adding a node moves about 1/n of keys"""
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = REPLICAS) -> None:
+        self._replicas = replicas
+        self._points: list[tuple[int, str]] = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node: str) -> None:
+        for i in range(self._replicas):
+            insort(self._points, (_hash(f"{node}#{i}".encode()), node))
+
+    def remove(self, node: str) -> None:
+        self._points = [point for point in self._points if point[1] != node]
+
+    def node_for(self, key: bytes) -> str:
+        if not self._points:
+            raise LookupError("The ring has no nodes")
+        index = bisect(self._points, (_hash(key), "")) % len(self._points)
+        return self._points[index][1]
+
+
+def _room_id(path: str) -> uuid.UUID | None:
+    match = ROOM_PATH.match(path)
+    if match is None:
+        return None
+    try:
+        return uuid.UUID(match.group(1))
+    except ValueError:
+        return None
+
+
+async def _read_body(receive: Receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        body += message.get("body", b"")
+        if not message.get("more_body", False):
+            break
+    return body
+
+
+async def _respond(send: Send, status_code: int, body: bytes) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class Dispatcher:
+    """ASGI app proxying every request to the worker that owns its room"""
+
+    def __init__(self, workers: list[str], secret: str) -> None:
+        self._workers = list(workers)
+        self._secret = secret
+        self._ring = HashRing(self._workers)
+        self._client: httpx.AsyncClient | None = None
+        # Rebalancing waits for in-flight requests and holds new ones back meanwhile
+        self._inflight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._open = asyncio.Event()
+        self._open.set()
+        self._rebalance_lock = asyncio.Lock()
+
+    @property
+    def home(self) -> str:
+        return self._workers[0]
+
+    def worker_for(self, path: str) -> str:
+        room_id = _room_id(path)
+        if room_id is None:
+            return self.home
+        return self._ring.node_for(room_id.bytes)
+
+    async def add_worker(self, url: str) -> None:
+        """Hands a share of the rooms to a new worker, the others drop their caches"""
+        async with self._rebalance_lock:
+            self._open.clear()
+            try:
+                await self._idle.wait()
+                responses = await asyncio.gather(
+                    *(
+                        self._client.post(
+                            f"{worker}/cluster/release",
+                            headers={SECRET_HEADER: self._secret},
+                        )
+                        for worker in self._workers
+                    )
+                )
+                for response in responses:
+                    response.raise_for_status()
+                self._workers.append(url)
+                self._ring.add(url)
+            finally:
+                self._open.set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] == "websocket":
+            await self._proxy_websocket(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if path.startswith("/cluster/"):
+            await _respond(send, 404, b'{"detail":"Not Found"}')
+            return
+        # Event streams stay open for the whole game and must not block rebalancing
+        streaming = path.endswith("/events")
+        while not self._open.is_set():
+            await self._open.wait()
+        if not streaming:
+            self._inflight += 1
+            self._idle.clear()
+        try:
+            body = await _read_body(receive)
+            if scope["method"] == "POST" and path == BATCH_PATH:
+                await self._dispatch_batch(scope, body, send)
+            else:
+                await self._proxy(scope, body, send, self.worker_for(path))
+        finally:
+            if not streaming:
+                self._inflight -= 1
+                if not self._inflight:
+                    self._idle.set()
+
+    async def _proxy_websocket(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        """Relays frames both ways between the client and the owner of the room"""
+        await receive()
+        if websocket_connect is None:
+            await send({"type": "websocket.close", "code": 1003})
+            return
+        while not self._open.is_set():
+            await self._open.wait()
+        worker = self.worker_for(scope["path"])
+        url = "ws" + worker.removeprefix("http") + scope["path"]
+        if scope["query_string"]:
+            url += "?" + scope["query_string"].decode()
+        headers = []
+        if scope.get("client"):
+            headers.append(("X-Forwarded-For", scope["client"][0]))
+        try:
+            upstream = await websocket_connect(
+                url,
+                additional_headers=headers,
+                subprotocols=scope.get("subprotocols") or None,
+            )
+        except InvalidHandshake:
+            # The worker refused it, e.g. an unknown room
+            await send({"type": "websocket.close", "code": 1008})
+            return
+        except OSError:
+            logger.exception("Worker %s is unreachable", worker)
+            await send({"type": "websocket.close", "code": 1011})
+            return
+        try:
+            await send(
+                {"type": "websocket.accept", "subprotocol": upstream.subprotocol}
+            )
+            relays = [
+                asyncio.ensure_future(self._to_client(upstream, send)),
+                asyncio.ensure_future(self._to_worker(upstream, receive)),
+            ]
+            try:
+                await asyncio.wait(relays, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for relay in relays:
+                    relay.cancel()
+                    if relay.done() and not relay.cancelled():
+                        # Either side going away first is the normal way to end
+                        relay.exception()
+        finally:
+            await upstream.close()
+
+    async def _to_client(self, upstream: "ClientConnection", send: Send) -> None:
+        try:
+            async for data in upstream:
+                if isinstance(data, str):
+                    await send({"type": "websocket.send", "text": data})
+                else:
+                    await send({"type": "websocket.send", "bytes": data})
+        except ConnectionClosed:
+            pass
+        code = upstream.close_code or 1000
+        await send(
+            {
+                "type": "websocket.close",
+                "code": RESERVED_CLOSE_CODES.get(code, code),
+                "reason": upstream.close_reason or "",
+            }
+        )
+
+    async def _to_worker(self, upstream: "ClientConnection", receive: Receive) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                code = message.get("code", 1000)
+                await upstream.close(RESERVED_CLOSE_CODES.get(code, code))
+                return
+            data = message.get("text")
+            if data is None:
+                data = message.get("bytes")
+            if data is not None:
+                try:
+                    await upstream.send(data)
+                except ConnectionClosed:
+                    return
+
+    def _request(self, scope: Scope, worker: str, body: bytes) -> httpx.Request:
+        url = worker + scope.get("raw_path", scope["path"].encode()).decode()
+        if scope["query_string"]:
+            url += "?" + scope["query_string"].decode()
+        headers = [
+            (name, value)
+            for name, value in scope["headers"]
+            if name.lower() not in HOP_HEADERS
+        ]
+        if scope.get("client"):
+            # uvicorn on the workers trusts this from localhost by default
+            headers.append((b"x-forwarded-for", scope["client"][0].encode()))
+        return self._client.build_request(
+            scope["method"], url, headers=headers, content=body
+        )
+
+    async def _proxy(self, scope: Scope, body: bytes, send: Send, worker: str) -> None:
+        try:
+            response = await self._client.send(
+                self._request(scope, worker, body), stream=True
+            )
+        except httpx.TransportError:
+            logger.exception("Worker %s is unreachable", worker)
+            await _respond(send, 502, b'{"detail":"Worker unavailable"}')
+            return
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": response.status_code,
+                    "headers": [
+                        (name, value)
+                        for name, value in response.headers.raw
+                        if name.lower() not in HOP_HEADERS - {b"content-length"}
+                    ],
+                }
+            )
+            async for chunk in response.aiter_raw():
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            await response.aclose()
+
+    async def _dispatch_batch(self, scope: Scope, body: bytes, send: Send) -> None:
+        """Splits a multi-room batch by owner and merges the results in order"""
+        try:
+            moves = json.loads(body)
+            owners = [self.worker_for(f"/rooms/{move['room_id']}") for move in moves]
+        except (ValueError, TypeError, KeyError):
+            # Let the worker answer with the usual validation error
+            await self._proxy(scope, body, send, self.home)
+            return
+
+        groups: dict[str, list[int]] = {}
+        for index, owner in enumerate(owners):
+            groups.setdefault(owner, []).append(index)
+        responses = await asyncio.gather(
+            *(
+                self._client.send(
+                    self._request(
+                        scope,
+                        worker,
+                        json.dumps([moves[index] for index in indexes]).encode(),
+                    )
+                )
+                for worker, indexes in groups.items()
+            )
+        )
+        results: list = [None] * len(moves)
+        for indexes, response in zip(groups.values(), responses):
+            if response.status_code != 200:
+                await _respond(send, response.status_code, response.content)
+                return
+            for index, result in zip(indexes, response.json()):
+                results[index] = result
+        await _respond(send, 200, json.dumps(results).encode())
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message: Message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._client = httpx.AsyncClient(
+                    timeout=httpx.Timeout(30.0, read=None),
+                    limits=httpx.Limits(max_connections=None),
+                )
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self._client.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def _spawn(host: str, port: int, home: str | None, secret: str) -> subprocess.Popen:
+    env = os.environ.copy()
+    env["CLUSTER_SECRET"] = secret
+    env.pop("LEADERBOARD_URL", None)
+    if home is not None:
+        env["LEADERBOARD_URL"] = home
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--host",
+            host,
+            "--port",
+            str(port),
+        ],
+        env=env,
+    )
+
+
+async def _wait_ready(url: str) -> None:
+    async with httpx.AsyncClient(base_url=url) as client:
+        for _ in range(100):
+            try:
+                await client.get("/metrics")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"Worker {url} did not start")
+
+
+async def main(args: argparse.Namespace) -> None:
+    import uvicorn
+
+    processes: list[subprocess.Popen] = []
+    # Guards the /cluster endpoints the workers mount, new for every run
+    secret = secrets.token_urlsafe(32)
+
+    async def start_worker() -> str:
+        port = args.worker_port + len(processes)
+        home = f"http://{args.host}:{args.worker_port}" if processes else None
+        processes.append(_spawn(args.host, port, home, secret))
+        url = f"http://{args.host}:{port}"
+        await _wait_ready(url)
+        return url
+
+    try:
+        workers = [await start_worker() for _ in range(args.workers)]
+        dispatcher = Dispatcher(workers, secret)
+
+        async def scale_up() -> None:
+            url = await start_worker()
+            await dispatcher.add_worker(url)
+            logger.warning("Added worker %s, %d in total", url, len(processes))
+
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGUSR1, lambda: asyncio.ensure_future(scale_up())
+        )
+        server = uvicorn.Server(uvicorn.Config(dispatcher, args.host, args.port))
+        await server.serve()
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--worker-port", type=int, default=8100, help="First port of the workers"
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,51 @@
+"""Game rules shared by the ORM room and the terminal game.
+
+Only the standard library, app.board and app.exc are imported, so the terminal game
+and the self-play simulator start without loading SQLAlchemy or FastAPI.
+"""
+
+from enum import Enum
+
+from app.board import Board, BoardStates
+from app.exc import BoardStatesNotFound
+
+
+class Symbols(str, Enum):
+    X = "X"
+    O = "O"
+
+
+class WinnerStates(str, Enum):
+    NONE = "NONE"
+    FIRST = "FIRST"
+    SECOND = "SECOND"
+    STALEMATE = "STALEMATE"
+
+
+# Symbols by seat, the first player always plays X
+SEAT_SYMBOLS = (Symbols.X.value, Symbols.O.value)
+
+
+def board_state(board: Board, symbol: str) -> BoardStates:
+    if board.check_victory(symbol):
+        return BoardStates.WIN
+    if board.check_stalemate():
+        return BoardStates.STALEMATE
+    return BoardStates.NO_WIN
+
+
+def decide(board: Board, first_symbol: str, second_symbol: str) -> WinnerStates:
+    stateFirst: BoardStates = board_state(board, first_symbol)
+    stateSecond: BoardStates = board_state(board, second_symbol)
+
+    match stateFirst:
+        case BoardStates.STALEMATE:
+            return WinnerStates.STALEMATE
+        case BoardStates.WIN:
+            return WinnerStates.FIRST
+        case BoardStates.NO_WIN:
+            if stateSecond is BoardStates.WIN:
+                return WinnerStates.SECOND
+            return WinnerStates.NONE
+        case _:
+            raise BoardStatesNotFound("Couldn't find a boardstate, somehow")
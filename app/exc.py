@@ -24,3 +24,7 @@ class BoardStatesNotFound(Exception):
 
 class DuplicatePlayer(Exception):
     pass
+
+
+class LeaseTaken(Exception):
+    pass
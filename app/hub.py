@@ -0,0 +1,46 @@
+import asyncio
+import uuid
+
+
+class RoomHub:
+    """In-process pub/sub of encoded game updates keyed by room id, a None message
+    ends the subscription"""
+
+    def __init__(self, queue_size: int = 16) -> None:
+        self._queue_size = queue_size
+        self._subscribers: dict[uuid.UUID, set[asyncio.Queue[str | None]]] = {}
+
+    def has_subscribers(self, room_id: uuid.UUID) -> bool:
+        return room_id in self._subscribers
+
+    def subscribe(self, room_id: uuid.UUID) -> asyncio.Queue[str | None]:
+        queue: asyncio.Queue[str | None] = asyncio.Queue(self._queue_size)
+        self._subscribers.setdefault(room_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, room_id: uuid.UUID, queue: asyncio.Queue[str | None]) -> None:
+        queues = self._subscribers.get(room_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[room_id]
+
+    def publish(self, room_id: uuid.UUID, message: str) -> None:
+        for queue in self._subscribers.get(room_id, ()):
+            if queue.full():
+                # A slow subscriber only needs the latest state, drop the oldest one
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    def close_all(self) -> None:
+        """Ends every subscription, once rooms may move to another process"""
+        subscribers, self._subscribers = self._subscribers, {}
+        for queues in subscribers.values():
+            for queue in queues:
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+hub = RoomHub()
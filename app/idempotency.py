@@ -0,0 +1,62 @@
+import asyncio
+from collections import OrderedDict
+import time
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from fastapi import HTTPException
+
+T = TypeVar("T")
+
+
+class IdempotencyStore:
+    """Recent outcomes by client request id, a retried request gets the original one.
+
+    Both results and HTTPExceptions are kept, any other failure forgets the key so
+    the retry runs again. A retry arriving while the first attempt is still running
+    waits for it instead of applying the move twice."""
+
+    def __init__(self, capacity: int = 10000, ttl: float = 300.0) -> None:
+        self._capacity = capacity
+        self._ttl = ttl
+        # Insertion order is expiry order since every entry lives for the same ttl
+        self._entries: OrderedDict[Hashable, tuple[float, asyncio.Future]] = (
+            OrderedDict()
+        )
+
+    def _evict_expired(self, now: float) -> None:
+        while self._entries:
+            expires, _ = next(iter(self._entries.values()))
+            if expires > now:
+                break
+            self._entries.popitem(last=False)
+
+    async def run(self, key: Hashable, action: Callable[[], Awaitable[T]]) -> T:
+        now = time.monotonic()
+        self._evict_expired(now)
+        entry = self._entries.get(key)
+        if entry is not None:
+            return await asyncio.shield(entry[1])
+
+        outcome: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._entries[key] = (now + self._ttl, outcome)
+        while len(self._entries) > self._capacity:
+            self._entries.popitem(last=False)
+        try:
+            result = await action()
+        except HTTPException as e:
+            outcome.set_exception(e)
+            # Marks the exception as retrieved, replays raise it again
+            outcome.exception()
+            raise
+        except BaseException as e:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is outcome:
+                del self._entries[key]
+            outcome.set_exception(e)
+            outcome.exception()
+            raise
+        outcome.set_result(result)
+        return result
+
+
+move_requests = IdempotencyStore()
@@ -0,0 +1,204 @@
+import asyncio
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+import logging
+import os
+import uuid
+import httpx
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.cluster import CLUSTER_SECRET, SECRET_HEADER
+from app.db import IS_SQLITE, Session, write_session
+from app.models.stats import INITIAL_RATING, PlayerStats
+
+logger = logging.getLogger(__name__)
+
+# Elo update factor, how far a single game moves a rating
+K_FACTOR = 32.0
+
+# Worker that owns the leaderboard, app.dispatch sets it on every other worker so
+# results are counted in one place
+LEADERBOARD_URL = os.environ.get("LEADERBOARD_URL")
+
+
+@dataclass
+class Stats:
+    player_id: uuid.UUID
+    wins: int = 0
+    losses: int = 0
+    draws: int = 0
+    rating: float = INITIAL_RATING
+
+    @property
+    def key(self) -> tuple[float, uuid.UUID]:
+        # Highest rating first, ties broken by id so every key is unique
+        return (-self.rating, self.player_id)
+
+
+class Leaderboard:
+    """Player aggregates and ratings held in memory, checkpointed to player_stats"""
+
+    def __init__(
+        self, checkpoint_interval: float = 5.0, owner: str | None = LEADERBOARD_URL
+    ) -> None:
+        self._checkpoint_interval = checkpoint_interval
+        self._owner = owner
+        self._stats: dict[uuid.UUID, Stats] = {}
+        # Sorted keys of every rated player, the position is the rank
+        self._ranking: list[tuple[float, uuid.UUID]] = []
+        self._dirty: set[uuid.UUID] = set()
+        self._checkpoint_lock = asyncio.Lock()
+        # Results waiting to be sent to the owner
+        self._outbox: list[dict] = []
+        self._client: httpx.AsyncClient | None = None
+
+    async def load(self) -> None:
+        async with Session() as session:
+            result = await session.execute(select(PlayerStats))
+            rows = result.scalars().all()
+        self._stats = {
+            row.player_id: Stats(
+                row.player_id, row.wins, row.losses, row.draws, row.rating
+            )
+            for row in rows
+        }
+        self._ranking = sorted(stats.key for stats in self._stats.values())
+        self._dirty.clear()
+
+    def get(self, player_id: uuid.UUID) -> Stats | None:
+        return self._stats.get(player_id)
+
+    def rank(self, stats: Stats) -> int:
+        """1-based position of the player on the leaderboard"""
+        return bisect_left(self._ranking, stats.key) + 1
+
+    def top(self, limit: int, offset: int = 0) -> list[Stats]:
+        return [
+            self._stats[player_id]
+            for _, player_id in self._ranking[offset : offset + limit]
+        ]
+
+    def _stats_of(self, player_id: uuid.UUID) -> Stats:
+        stats = self._stats.get(player_id)
+        if stats is None:
+            stats = self._stats[player_id] = Stats(player_id)
+            insort(self._ranking, stats.key)
+        return stats
+
+    def _rate(self, stats: Stats, rating: float) -> None:
+        del self._ranking[bisect_left(self._ranking, stats.key)]
+        stats.rating = rating
+        insort(self._ranking, stats.key)
+        self._dirty.add(stats.player_id)
+
+    def record(
+        self, first_id: uuid.UUID, second_id: uuid.UUID, winner_id: uuid.UUID | None
+    ) -> None:
+        """Counts a finished game and moves both ratings by the Elo rule"""
+        first = self._stats_of(first_id)
+        second = self._stats_of(second_id)
+        if winner_id is None:
+            first.draws += 1
+            second.draws += 1
+            score = 0.5
+        elif winner_id == first_id:
+            first.wins += 1
+            second.losses += 1
+            score = 1.0
+        else:
+            first.losses += 1
+            second.wins += 1
+            score = 0.0
+        expected = 1 / (1 + 10 ** ((second.rating - first.rating) / 400))
+        change = K_FACTOR * (score - expected)
+        first_rating, second_rating = first.rating + change, second.rating - change
+        self._rate(first, first_rating)
+        self._rate(second, second_rating)
+
+    def submit(
+        self, first_id: uuid.UUID, second_id: uuid.UUID, winner_id: uuid.UUID | None
+    ) -> None:
+        """Records the game here, or queues it for the owner when another worker owns
+        the leaderboard"""
+        if self._owner is None:
+            self.record(first_id, second_id, winner_id)
+            return
+        self._outbox.append(
+            {
+                "first_player_id": str(first_id),
+                "second_player_id": str(second_id),
+                "winner_player_id": None if winner_id is None else str(winner_id),
+            }
+        )
+
+    async def forward(self) -> None:
+        """Sends queued results to the owner, they are kept for the next try on failure"""
+        if not self._outbox:
+            return
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self._owner, headers={SECRET_HEADER: CLUSTER_SECRET or ""}
+            )
+        results, self._outbox = self._outbox, []
+        try:
+            response = await self._client.post("/cluster/results", json=results)
+            response.raise_for_status()
+        except BaseException:
+            self._outbox[:0] = results
+            raise
+
+    async def checkpoint(self) -> None:
+        async with self._checkpoint_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            rows = []
+            for player_id in dirty:
+                stats = self._stats[player_id]
+                rows.append(
+                    {
+                        "player_id": player_id,
+                        "wins": stats.wins,
+                        "losses": stats.losses,
+                        "draws": stats.draws,
+                        "rating": stats.rating,
+                    }
+                )
+            # Upserted so a row written by another process never fails the checkpoint
+            statement = (sqlite if IS_SQLITE else postgresql).insert(PlayerStats)
+            statement = statement.on_conflict_do_update(
+                index_elements=[PlayerStats.player_id],
+                set_={
+                    column: statement.excluded[column]
+                    for column in ("wins", "losses", "draws", "rating")
+                },
+            )
+            try:
+                async with write_session() as session:
+                    await session.execute(statement, rows)
+                    await session.commit()
+            except BaseException:
+                self._dirty |= dirty
+                raise
+
+    async def run(self) -> None:
+        """Background checkpoint loop, started with the application"""
+        while True:
+            await asyncio.sleep(self._checkpoint_interval)
+            try:
+                await self.forward()
+                await self.checkpoint()
+            except Exception:
+                logger.exception("Failed to checkpoint the leaderboard")
+
+    async def close(self) -> None:
+        try:
+            await self.forward()
+        finally:
+            if self._client is not None:
+                await self._client.aclose()
+        await self.checkpoint()
+
+
+leaderboard = Leaderboard()
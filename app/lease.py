@@ -0,0 +1,81 @@
+"""Single ownership of the rooms, which the write-behind room cache relies on.
+
+Moves are acknowledged from app.cache before they reach the database, so two
+processes caching the same room would overwrite each other's moves. A standalone
+process therefore takes the lease exclusively and app.dispatch workers take it
+shared, the dispatcher already gives each room one owner among them. A second
+standalone process, e.g. uvicorn --workers 2, fails at startup instead.
+
+Postgres holds the lease as an advisory lock, SQLite as a lock on a file next to
+the database.
+"""
+
+from sqlalchemy import make_url, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.cluster import CLUSTER_SECRET
+from app.db import DATABASE_URL, IS_SQLITE, engine
+from app.exc import LeaseTaken
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Advisory lock key, any constant shared by every process on the database
+LEASE_KEY = 7_462_636_174_636_101
+
+
+class RoomLease:
+    def __init__(self, shared: bool) -> None:
+        self._shared = shared
+        self._connection: AsyncConnection | None = None
+        self._file = None
+
+    async def acquire(self) -> None:
+        if IS_SQLITE:
+            self._lock_file()
+            return
+        connection = await engine.connect()
+        # Held for the whole lifetime, outside of any transaction
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        function = (
+            "pg_try_advisory_lock_shared" if self._shared else "pg_try_advisory_lock"
+        )
+        result = await connection.execute(
+            text(f"SELECT {function}(:key)"), {"key": LEASE_KEY}
+        )
+        if not result.scalar():
+            await connection.close()
+            raise LeaseTaken(self._message())
+        self._connection = connection
+
+    def _lock_file(self) -> None:
+        database = make_url(DATABASE_URL).database
+        if fcntl is None or database in (None, "", ":memory:"):
+            return
+        file = open(f"{database}.lease", "a")
+        mode = fcntl.LOCK_SH if self._shared else fcntl.LOCK_EX
+        try:
+            fcntl.flock(file, mode | fcntl.LOCK_NB)
+        except BlockingIOError:
+            file.close()
+            raise LeaseTaken(self._message())
+        self._file = file
+
+    def _message(self) -> str:
+        return (
+            "Another process already serves the rooms of this database, run several"
+            " processes through app.dispatch"
+        )
+
+    async def release(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+room_lease = RoomLease(shared=CLUSTER_SECRET is not None)
@@ -1,7 +1,53 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
-from app.routers import players, rooms
+from app import solver
+from app.cache import room_cache
+from app.cluster import CLUSTER_SECRET
+from app.db import engine
+from app.leaderboard import leaderboard
+from app.lease import room_lease
+from app.metrics import MetricsMiddleware, instrument_engine
+from app.reaper import reaper
+from app.responses import FastJSONResponse
+from app.routers import (
+    cluster,
+    matchmaking,
+    monitoring,
+    moves,
+    players,
+    ranking,
+    rooms,
+)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await room_lease.acquire()
+    solver.table()
+    await leaderboard.load()
+    flusher = asyncio.create_task(room_cache.run())
+    checkpointer = asyncio.create_task(leaderboard.run())
+    reaping = asyncio.create_task(reaper.run())
+    yield
+    reaping.cancel()
+    flusher.cancel()
+    checkpointer.cancel()
+    await room_cache.close()
+    await leaderboard.close()
+    await room_lease.release()
+
+
+instrument_engine(engine)
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(MetricsMiddleware)
 app.include_router(players.router)
 app.include_router(rooms.router)
+app.include_router(moves.router)
+app.include_router(matchmaking.router)
+app.include_router(ranking.router)
+app.include_router(monitoring.router)
+if CLUSTER_SECRET is not None:
+    app.include_router(cluster.router)
@@ -0,0 +1,86 @@
+from collections import OrderedDict
+import os
+import time
+import uuid
+
+BUCKET_WIDTH = 100
+
+# Seconds a player stays queued without polling, and a found room is kept for them
+MATCHMAKING_TTL = float(os.environ.get("MATCHMAKING_TTL", 30))
+
+
+class MatchmakingQueue:
+    """FIFO of waiting players split into rating buckets, every operation is O(1)"""
+
+    def __init__(
+        self, bucket_width: int = BUCKET_WIDTH, ttl: float = MATCHMAKING_TTL
+    ) -> None:
+        self._bucket_width = bucket_width
+        self._ttl = ttl
+        self._buckets: dict[int, OrderedDict[uuid.UUID, None]] = {}
+        # Waiting player -> rating they queued with and when they last polled,
+        # least recently polled first
+        self._waiting: OrderedDict[uuid.UUID, tuple[int, float]] = OrderedDict()
+        # Waiting player -> room found for them and when, oldest first
+        self._matches: OrderedDict[uuid.UUID, tuple[uuid.UUID, float]] = OrderedDict()
+
+    def _expire(self) -> None:
+        """Drops players who stopped polling and rooms nobody came to collect"""
+        deadline = time.monotonic() - self._ttl
+        while self._waiting:
+            player_id, (_, touched) = next(iter(self._waiting.items()))
+            if touched > deadline:
+                break
+            self.remove(player_id)
+        while self._matches:
+            player_id, (_, found) = next(iter(self._matches.items()))
+            if found > deadline:
+                break
+            del self._matches[player_id]
+
+    def touch(self, player_id: uuid.UUID) -> bool:
+        """Keeps a waiting player in the queue, returns whether they are waiting"""
+        self._expire()
+        entry = self._waiting.get(player_id)
+        if entry is None:
+            return False
+        self._waiting[player_id] = (entry[0], time.monotonic())
+        self._waiting.move_to_end(player_id)
+        return True
+
+    def pop_opponent(self, rating: int = 0) -> tuple[uuid.UUID, int] | None:
+        """Takes the longest waiting player from the closest bucket, with their rating"""
+        self._expire()
+        bucket = rating // self._bucket_width
+        for key in (bucket, bucket - 1, bucket + 1):
+            waiting = self._buckets.get(key)
+            if waiting:
+                player_id, _ = waiting.popitem(last=False)
+                return player_id, self._waiting.pop(player_id)[0]
+        return None
+
+    def push(self, player_id: uuid.UUID, rating: int = 0, front: bool = False) -> None:
+        waiting = self._buckets.setdefault(rating // self._bucket_width, OrderedDict())
+        waiting[player_id] = None
+        if front:
+            waiting.move_to_end(player_id, last=False)
+        self._waiting[player_id] = (rating, time.monotonic())
+
+    def remove(self, player_id: uuid.UUID) -> bool:
+        entry = self._waiting.pop(player_id, None)
+        if entry is None:
+            return False
+        del self._buckets[entry[0] // self._bucket_width][player_id]
+        return True
+
+    def set_match(self, player_id: uuid.UUID, room_id: uuid.UUID) -> None:
+        self._matches[player_id] = (room_id, time.monotonic())
+
+    def pop_match(self, player_id: uuid.UUID) -> uuid.UUID | None:
+        """The room found for the player, handed out once"""
+        self._expire()
+        match = self._matches.pop(player_id, None)
+        return None if match is None else match[0]
+
+
+matchmaking_queue = MatchmakingQueue()
@@ -0,0 +1,203 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+import logging
+import os
+import time
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+QUERY_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21)
+
+# Requests slower than this many seconds are logged, unset disables the log
+SLOW_REQUEST_SECONDS = os.environ.get("SLOW_REQUEST_SECONDS")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> (count per bucket with a trailing +Inf bucket, sum)
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts, total = self._values.setdefault(
+            labels, ([0] * (len(self.buckets) + 1), [0.0])
+        )
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else str(bound)
+                lines.append(
+                    f"{self.name}_bucket{_labels(names, labels + (le,))} {cumulative}"
+                )
+            suffix = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {total[0]}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+request_latency = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route",
+    ("method", "route", "status"),
+)
+request_queries = Histogram(
+    "http_request_db_queries",
+    "Database queries issued per request",
+    ("method", "route"),
+    QUERY_BUCKETS,
+)
+request_db_time = Histogram(
+    "http_request_db_seconds",
+    "Time spent in the database per request",
+    ("method", "route"),
+)
+db_queries = Counter("db_queries_total", "Database queries, requests and background")
+db_time = Counter("db_query_seconds_total", "Time spent in the database")
+games_started = Counter("games_started_total", "Rooms created")
+moves_applied = Counter("moves_applied_total", "Moves accepted")
+games_finished = Counter(
+    "games_finished_total", "Finished games by result", ("result",)
+)
+rooms_reaped = Counter(
+    "rooms_reaped_total", "Idle rooms removed by the reaper", ("action",)
+)
+
+METRICS = (
+    request_latency,
+    request_queries,
+    request_db_time,
+    db_queries,
+    db_time,
+    games_started,
+    moves_applied,
+    games_finished,
+    rooms_reaped,
+)
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+@dataclass
+class _RequestStats:
+    queries: int = 0
+    db_time: float = 0.0
+
+
+_request_stats: ContextVar[_RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Counts queries and their time, per request when one is in progress"""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        db_queries.inc()
+        db_time.inc(amount=elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+
+class MetricsMiddleware:
+    """Records latency and database usage of every HTTP request by route template"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.slow = (
+            None if SLOW_REQUEST_SECONDS is None else float(SLOW_REQUEST_SECONDS)
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = _RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_stats.reset(token)
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            request_latency.observe(elapsed, method, path, str(status_code))
+            request_queries.observe(stats.queries, method, path)
+            request_db_time.observe(stats.db_time, method, path)
+            if self.slow is not None and elapsed > self.slow:
+                logger.warning(
+                    "Slow request %s %s took %.3fs with %d queries (%.3fs in the database)",
+                    method,
+                    scope["path"],
+                    elapsed,
+                    stats.queries,
+                    stats.db_time,
+                )
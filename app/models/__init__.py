@@ -1,3 +1,6 @@
 from app.models.base import Base
 from app.models.room import Room
 from app.models.player import Player
+from app.models.move import Move
+from app.models.stats import PlayerStats
+from app.models.archive import ArchivedRoom
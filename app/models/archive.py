@@ -0,0 +1,24 @@
+from datetime import datetime
+import uuid
+from sqlalchemy import DateTime, LargeBinary, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class ArchivedRoom(Base):
+    """Finished game moved out of rooms by app.reaper, without any live-game columns"""
+
+    __tablename__ = "rooms_archive"
+
+    room_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    first_player_id: Mapped[uuid.UUID] = mapped_column(index=True)
+    second_player_id: Mapped[uuid.UUID] = mapped_column(index=True)
+    # None is a stalemate
+    winner_player_id: Mapped[uuid.UUID | None]
+    size: Mapped[int] = mapped_column(SmallInteger)
+    win_length: Mapped[int] = mapped_column(SmallInteger)
+    board: Mapped[bytes] = mapped_column(LargeBinary)
+    move_count: Mapped[int] = mapped_column(SmallInteger)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
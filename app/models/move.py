@@ -0,0 +1,19 @@
+from datetime import datetime
+import uuid
+from sqlalchemy import DateTime, ForeignKey, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class Move(Base):
+    """Append-only log of every move, kept apart from rooms so it outlives them"""
+
+    __tablename__ = "moves"
+
+    room_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    ply: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    player_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("players.player_id"))
+    # Row-major index of the cell, row * size + col counted from zero
+    cell: Mapped[int] = mapped_column(SmallInteger)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
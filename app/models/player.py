@@ -1,4 +1,3 @@
-from enum import Enum
 from typing import List, TYPE_CHECKING
 from sqlalchemy.orm import Mapped, mapped_column, relationship, synonym
 import uuid
@@ -9,16 +8,10 @@ if TYPE_CHECKING:
     from app.models.room import Room
 
 
-class Symbols(str, Enum):
-    X = "X"
-    O = "O"
-
-
 class Player(Base):
     __tablename__ = "players"
     player_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
     name: Mapped[str]
-    _symbol: Mapped[str | None] = mapped_column("symbol", default=None)
 
     _player_id = synonym("player_id")
 
@@ -30,13 +23,3 @@ class Player(Base):
     @property
     def get_player_id(self) -> uuid.UUID:
         return self._player_id
-
-    @property
-    def symbol(self) -> str:
-        if self._symbol is None:
-            raise LookupError("A symbol wasn't assinged to a player!")
-        return self._symbol
-
-    @symbol.setter
-    def set_symbol(self, symbol: str) -> None:
-        self._symbol = symbol
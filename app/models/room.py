@@ -1,18 +1,27 @@
+from datetime import datetime, timezone
 from enum import Enum
-import json
 from typing import List, TYPE_CHECKING
 import uuid
-from sqlalchemy import JSON, ForeignKey
+from sqlalchemy import (
+    DateTime,
+    ForeignKey,
+    Index,
+    LargeBinary,
+    SmallInteger,
+    String,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship, synonym
-from app.board import Board, BoardStates
+from app.board import SIZE, WIN_LENGTH, Board
+from app.codec import decode_board, encode_board
 from app.exc import (
-    BoardStatesNotFound,
     DuplicatePlayer,
+    InvalidPlay,
     OutOfOrder,
     RoomFull,
     RoomNotFull,
 )
-from app.models.player import Symbols
+from app.engine import SEAT_SYMBOLS, WinnerStates, decide
 
 if TYPE_CHECKING:
     from app.models.player import Player
@@ -24,11 +33,10 @@ class ActiveState(str, Enum):
     SECOND = "SECOND"
 
 
-class WinnerStates(str, Enum):
-    NONE = "NONE"
-    FIRST = "FIRST"
-    SECOND = "SECOND"
-    STALEMATE = "STALEMATE"
+class GameStatus(str, Enum):
+    WAITING = "WAITING"
+    ACTIVE = "ACTIVE"
+    FINISHED = "FINISHED"
 
 
 class NextTurn(str, Enum):
@@ -38,6 +46,38 @@ class NextTurn(str, Enum):
 
 class Room(Base):
     __tablename__ = "rooms"
+    __table_args__ = (
+        # Open games of a player, finished rooms are left out of the index
+        Index(
+            "ix_rooms_first_player_active",
+            "first_player_id",
+            postgresql_where=text("status <> 'FINISHED'"),
+            sqlite_where=text("status <> 'FINISHED'"),
+        ),
+        Index(
+            "ix_rooms_second_player_active",
+            "second_player_id",
+            postgresql_where=text("status <> 'FINISHED'"),
+            sqlite_where=text("status <> 'FINISHED'"),
+        ),
+        # Idle rooms looked up by app.reaper
+        Index("ix_rooms_updated_at", "updated_at"),
+        # Results of a player, most recent first
+        Index(
+            "ix_rooms_first_player_history",
+            "first_player_id",
+            "finished_at",
+            postgresql_where=text("status = 'FINISHED'"),
+            sqlite_where=text("status = 'FINISHED'"),
+        ),
+        Index(
+            "ix_rooms_second_player_history",
+            "second_player_id",
+            "finished_at",
+            postgresql_where=text("status = 'FINISHED'"),
+            sqlite_where=text("status = 'FINISHED'"),
+        ),
+    )
 
     room_id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
 
@@ -47,21 +87,43 @@ class Room(Base):
     )
 
     first_player: Mapped["Player"] = relationship(
-        "Player", foreign_keys=[first_player_id]
+        "Player", foreign_keys=[first_player_id], lazy="selectin"
     )
     second_player: Mapped["Player | None"] = relationship(
-        "Player", foreign_keys=[second_player_id]
+        "Player", foreign_keys=[second_player_id], lazy="selectin"
     )
 
+    # Symbols belong to the seat, so the players rows are never written on a join
+    first_symbol: Mapped[str | None] = mapped_column(String(1), default=None)
+    second_symbol: Mapped[str | None] = mapped_column(String(1), default=None)
+
     _room_id = synonym("room_id")
     _first_player = synonym("first_player")
     _second_player = synonym("second_player")
 
     active_player_state: Mapped[ActiveState] = mapped_column(default=ActiveState.FIRST)
 
-    board_json: Mapped[str] = mapped_column(
-        JSON(none_as_null=False),
-        default='[[" ", " ", " "],[" ", " ", " "], [" ", " ", " "]]',
+    size: Mapped[int] = mapped_column(default=SIZE)
+    win_length: Mapped[int] = mapped_column(default=WIN_LENGTH)
+
+    # Packed by app.codec, an empty board is stored as no bytes at all
+    board: Mapped[bytes] = mapped_column(LargeBinary, default=b"")
+    move_count: Mapped[int] = mapped_column(SmallInteger, default=0)
+
+    status: Mapped[GameStatus] = mapped_column(default=GameStatus.WAITING)
+    # None on a finished game is a stalemate
+    winner_player_id: Mapped[uuid.UUID | None] = mapped_column(
+        ForeignKey("players.player_id"), default=None
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    # Last change of any kind, rooms idle for too long are reaped by app.reaper
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), default=None
     )
 
     @property
@@ -72,10 +134,12 @@ class Room(Base):
             return self.second_player
 
     def copy_board(self) -> Board:
-        return Board(self.board_json)
+        return decode_board(self.board, self.size, self.win_length)
 
-    def update_board(self, fields: list[list[str]]) -> None:
-        self.board_json = json.dumps(fields)
+    def update_board(self, board: Board) -> None:
+        self.board = encode_board(board)
+        self.move_count = board.occupied.bit_count()
+        self.updated_at = datetime.now(timezone.utc)
 
     @property
     def get_room_id(self) -> int:
@@ -91,19 +155,37 @@ class Room(Base):
             raise LookupError("A player wasn't assigned!")
         return self._second_player
 
+    def get_player(self, player_id: uuid.UUID) -> "Player | None":
+        for player in (self._first_player, self._second_player):
+            if player is not None and player.get_player_id == player_id:
+                return player
+        return None
+
     def print_board(self) -> list[list[str]]:
         board = self.copy_board()
         return board.fields
 
+    def symbol_of(self, player: "Player") -> str:
+        if player is self._first_player:
+            symbol = self.first_symbol
+        elif player is self._second_player:
+            symbol = self.second_symbol
+        else:
+            raise LookupError("The player isn't seated in this room!")
+        if symbol is None:
+            raise LookupError("A symbol wasn't assinged to a player!")
+        return symbol
+
     def _assign_symbols(self) -> None:
-        self._first_player.set_symbol = Symbols.X.value
-        self._second_player.set_symbol = Symbols.O.value
+        self.first_symbol, self.second_symbol = SEAT_SYMBOLS
 
     def add_player(self, player: "Player") -> None:
         if self._second_player is None:
             if not player is self._first_player:
                 self._second_player = player
                 self._assign_symbols()
+                self.status = GameStatus.ACTIVE
+                self.updated_at = datetime.now(timezone.utc)
             else:
                 raise DuplicatePlayer("Cannot add a player already inside!")
         else:
@@ -119,38 +201,42 @@ class Room(Base):
             return
         self.active_player_state = ActiveState.FIRST
 
-    def make_play(self, player: "Player", row: int, col: int) -> None:
-        board = self.copy_board()
+    def make_play(self, player: "Player", row: int, col: int) -> bool:
+        """Applies the move and returns whether it ended the game"""
+        if self.status is GameStatus.WAITING:
+            raise RoomNotFull("The room is not full yet!")
+        if self.status is GameStatus.FINISHED:
+            raise InvalidPlay("The game is already finished")
         if player is self.active_player:
-            fields = board.edit_field(player.symbol, row, col)
-            if fields is not None:
-                self.update_board(fields)
+            board = self.copy_board()
+            won = board.edit_field(self.symbol_of(player), row, col)
+            self.update_board(board)
             self._switch_players()
+            if won or board.check_stalemate():
+                self._finish(player if won else None)
+                return True
+            return False
         else:
             raise OutOfOrder(
                 "A player tried interacting while not being the active player"
             )
 
-    def _check_board_state(self, active_player: "Player") -> BoardStates:
-        board = self.copy_board()
-        if board.check_victory(active_player):
-            return BoardStates.WIN
-        if board.check_stalemate():
-            return BoardStates.STALEMATE
-        return BoardStates.NO_WIN
+    def _finish(self, winner: "Player | None") -> None:
+        self.status = GameStatus.FINISHED
+        self.winner_player_id = None if winner is None else winner.get_player_id
+        self.finished_at = self.updated_at
 
     def compare_board_states(self) -> WinnerStates:
-        stateFirst: BoardStates = self._check_board_state(self._first_player)
-        stateSecond: BoardStates = self._check_board_state(self._second_player)
-
-        match stateFirst:
-            case BoardStates.STALEMATE:
-                return WinnerStates.STALEMATE
-            case BoardStates.WIN:
-                return WinnerStates.FIRST
-            case BoardStates.NO_WIN:
-                if stateSecond is BoardStates.WIN:
-                    return WinnerStates.SECOND
-                return WinnerStates.NONE
-            case _:
-                raise BoardStatesNotFound("Couldn't find a boardstate, somehow")
+        return decide(
+            self.copy_board(),
+            self.symbol_of(self._first_player),
+            self.symbol_of(self._second_player),
+        )
+
+    def get_result(self) -> uuid.UUID | NextTurn:
+        """Answered from the stored status, the board is never parsed"""
+        if self.status is not GameStatus.FINISHED:
+            return NextTurn.YES
+        if self.winner_player_id is None:
+            return NextTurn.NO
+        return self.winner_player_id
@@ -0,0 +1,21 @@
+import uuid
+from sqlalchemy import Double, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+INITIAL_RATING = 1500.0
+
+
+class PlayerStats(Base):
+    """Aggregates of finished games, kept up to date by app.leaderboard"""
+
+    __tablename__ = "player_stats"
+
+    player_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("players.player_id"), primary_key=True
+    )
+    wins: Mapped[int] = mapped_column(default=0)
+    losses: Mapped[int] = mapped_column(default=0)
+    draws: Mapped[int] = mapped_column(default=0)
+    rating: Mapped[float] = mapped_column(Double, default=INITIAL_RATING)
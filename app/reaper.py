@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import logging
+import os
+import uuid
+from sqlalchemy import delete, insert, select
+
+from app import metrics
+from app.cache import room_cache
+from app.db import Session, write_session
+from app.models.archive import ArchivedRoom
+from app.models.move import Move
+from app.models.room import GameStatus, Room
+
+logger = logging.getLogger(__name__)
+
+# Seconds without any change before a room is reaped
+ROOM_TTL = float(os.environ.get("ROOM_TTL", 24 * 60 * 60))
+REAPER_INTERVAL = float(os.environ.get("REAPER_INTERVAL", 60))
+REAPER_BATCH_SIZE = int(os.environ.get("REAPER_BATCH_SIZE", 500))
+# Pause between batches, bounds the reaper to batch size / pause rows per second
+REAPER_PAUSE = float(os.environ.get("REAPER_PAUSE", 0.5))
+
+ARCHIVED_COLUMNS = (
+    "room_id",
+    "first_player_id",
+    "second_player_id",
+    "winner_player_id",
+    "size",
+    "win_length",
+    "board",
+    "move_count",
+    "created_at",
+    "finished_at",
+)
+
+
+class Reaper:
+    """Archives finished games and deletes abandoned ones once they have been idle for
+    the ttl, a bounded batch at a time so it never competes with live traffic"""
+
+    def __init__(
+        self,
+        ttl: float = ROOM_TTL,
+        interval: float = REAPER_INTERVAL,
+        batch_size: int = REAPER_BATCH_SIZE,
+        pause: float = REAPER_PAUSE,
+    ) -> None:
+        self._ttl = ttl
+        self._interval = interval
+        self._batch_size = batch_size
+        self._pause = pause
+
+    async def _candidates(
+        self, finished: bool, cutoff: datetime, after: uuid.UUID | None
+    ) -> list[uuid.UUID]:
+        """The next page of idle rooms ordered by id, cached ones included"""
+        conditions = [
+            (
+                Room.status == GameStatus.FINISHED
+                if finished
+                else Room.status != GameStatus.FINISHED
+            ),
+            Room.updated_at < cutoff,
+        ]
+        if after is not None:
+            conditions.append(Room.room_id > after)
+        async with Session() as session:
+            result = await session.execute(
+                select(Room.room_id)
+                .where(*conditions)
+                .order_by(Room.room_id)
+                .limit(self._batch_size)
+            )
+            return list(result.scalars())
+
+    async def _reap_batch(
+        self, finished: bool, cutoff: datetime, after: uuid.UUID | None = None
+    ) -> list[uuid.UUID]:
+        """Reaps one page and returns its candidates, the next page starts after them"""
+        candidates = await self._candidates(finished, cutoff, after)
+        # Cached rooms may hold moves newer than their stored updated_at
+        room_ids = [room_id for room_id in candidates if room_id not in room_cache]
+        if not room_ids:
+            return candidates
+        statement = delete(Room).where(
+            Room.room_id.in_(room_ids), Room.updated_at < cutoff
+        )
+        async with write_session() as session:
+            if finished:
+                result = await session.execute(
+                    statement.returning(
+                        *(getattr(Room, column) for column in ARCHIVED_COLUMNS)
+                    )
+                )
+                rows = [row._asdict() for row in result]
+                if rows:
+                    await session.execute(insert(ArchivedRoom), rows)
+                reaped = [row["room_id"] for row in rows]
+            else:
+                result = await session.execute(statement.returning(Room.room_id))
+                reaped = list(result.scalars())
+                # Nothing refers to moves of abandoned games once the room is gone
+                if reaped:
+                    await session.execute(delete(Move).where(Move.room_id.in_(reaped)))
+            await session.commit()
+        room_cache.discard(reaped)
+        metrics.rooms_reaped.inc(
+            "archived" if finished else "expired", amount=len(reaped)
+        )
+        return candidates
+
+    async def reap(self) -> None:
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self._ttl)
+        for finished in (True, False):
+            candidates = await self._reap_batch(finished, cutoff)
+            while len(candidates) == self._batch_size:
+                await asyncio.sleep(self._pause)
+                candidates = await self._reap_batch(finished, cutoff, candidates[-1])
+
+    async def run(self) -> None:
+        """Background reaping loop, started with the application"""
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.reap()
+            except Exception:
+                logger.exception("Failed to reap idle rooms")
+
+
+reaper = Reaper()
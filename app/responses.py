@@ -0,0 +1,43 @@
+"""JSON responses for the hot endpoints, encoded by orjson when it is installed.
+
+Returning one of these from an endpoint skips FastAPI's response_model validation and
+jsonable_encoder, so they are only used for values the application built itself.
+"""
+
+from functools import lru_cache
+import json
+from typing import Any
+from starlette.responses import JSONResponse, Response
+
+from app.codec import decode_board
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, ensure_ascii=False, separators=(",", ":"), default=str
+    ).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class EncodedJSONResponse(Response):
+    """Body that is already encoded JSON, sent as it is"""
+
+    media_type = "application/json"
+
+
+@lru_cache(maxsize=8192)
+def board_fields(board: bytes, size: int, win_length: int) -> bytes:
+    """Encoded grid of a packed board, keyed by its contents so every finished board
+    and common opening is encoded once"""
+    return dumps(decode_board(board, size, win_length).fields)
@@ -1,15 +1,13 @@
-from enum import Enum
 import uuid
-from app.board import Board, BoardStates
+from app.board import Board
+from app.engine import SEAT_SYMBOLS, WinnerStates, decide
 from app.exc import (
-    BoardStatesNotFound,
     DuplicatePlayer,
     OutOfOrder,
     RoomFull,
     RoomNotFull,
 )
-from app.models.room import WinnerStates
-from app.models.player import Player, Symbols
+from app.player import Player
 
 
 class Room:
@@ -42,8 +40,7 @@ class Room:
         return self._board.fields
 
     def _assign_symbols(self) -> None:
-        self._first_player.symbol = Symbols.X.value
-        self._second_player.symbol = Symbols.O.value
+        self._first_player.symbol, self._second_player.symbol = SEAT_SYMBOLS
 
     def add_player(self, player: Player) -> None:
         if self._second_player is None:
@@ -74,25 +71,7 @@ class Room:
                 "A player tried interacting while not being the active player"
             )
 
-    def _check_board_state(self, active_player: Player) -> BoardStates:
-        if self._board.check_victory(active_player):
-            return BoardStates.WIN
-        if self._board.check_stalemate():
-            return BoardStates.STALEMATE
-        return BoardStates.NO_WIN
-
     def compare_board_states(self) -> WinnerStates:
-        stateFirst: BoardStates = self._check_board_state(self._first_player)
-        stateSecond: BoardStates = self._check_board_state(self._second_player)
-
-        match stateFirst:
-            case BoardStates.STALEMATE:
-                return WinnerStates.STALEMATE
-            case BoardStates.WIN:
-                return WinnerStates.FIRST
-            case BoardStates.NO_WIN:
-                if stateSecond is BoardStates.WIN:
-                    return WinnerStates.SECOND
-                return WinnerStates.NONE
-            case _:
-                raise BoardStatesNotFound("Couldn't find a boardstate, somehow")
+        return decide(
+            self._board, self._first_player.symbol, self._second_player.symbol
+        )
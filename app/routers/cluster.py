@@ -0,0 +1,72 @@
+import hmac
+import logging
+from typing import Annotated
+from fastapi import APIRouter, Body, Depends, Header, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from app.cache import room_cache
+from app.cluster import CLUSTER_SECRET, SECRET_HEADER
+from app.db import get_session
+from app.hub import hub
+from app.leaderboard import leaderboard
+from app.models.player import Player
+from app.schema import GameResult
+
+logger = logging.getLogger(__name__)
+
+
+async def authorize(
+    secret: Annotated[str | None, Header(alias=SECRET_HEADER)] = None,
+) -> None:
+    """Only the dispatcher and the other workers know the secret"""
+    if (
+        CLUSTER_SECRET is None
+        or secret is None
+        or not hmac.compare_digest(secret.encode(), CLUSTER_SECRET.encode())
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cluster endpoints are internal",
+        )
+
+
+# Mounted on app.dispatch workers only, the dispatcher never forwards it from clients
+router = APIRouter(prefix="/cluster", dependencies=[Depends(authorize)])
+
+
+@router.post("/release", status_code=status.HTTP_204_NO_CONTENT)
+async def release_rooms() -> None:
+    """Writes back and drops every cached room before rooms change owners, live
+    subscribers are disconnected so they reconnect to the new owner"""
+    await room_cache.release()
+    hub.close_all()
+
+
+@router.post("/results", status_code=status.HTTP_204_NO_CONTENT)
+async def record_results(
+    *,
+    session: AsyncSession = Depends(get_session),
+    results: Annotated[list[GameResult], Body()],
+) -> None:
+    """Games finished on other workers, counted by the worker owning the leaderboard"""
+    player_ids = {
+        player_id
+        for result in results
+        for player_id in (result.first_player_id, result.second_player_id)
+    }
+    known = await session.execute(
+        select(Player.player_id).where(Player.player_id.in_(player_ids))
+    )
+    known_ids = set(known.scalars())
+    for result in results:
+        players = (result.first_player_id, result.second_player_id)
+        # Unknown ids would fail the player_stats foreign key on every checkpoint
+        if not known_ids.issuperset(players) or result.winner_player_id not in (
+            None,
+            *players,
+        ):
+            logger.warning("Ignored the result of a game between %s and %s", *players)
+            continue
+        leaderboard.record(*players, result.winner_player_id)
@@ -0,0 +1,96 @@
+from typing import Annotated
+import uuid
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from app import metrics
+from app.db import get_session
+from app.leaderboard import leaderboard
+from app.matchmaking import matchmaking_queue
+from app.models.player import Player
+from app.models.room import Room
+from app.models.stats import INITIAL_RATING
+from app.schema import MatchStatus
+
+router = APIRouter(prefix="/matchmaking")
+
+
+@router.post(
+    "/enqueue", response_model=MatchStatus, status_code=status.HTTP_201_CREATED
+)
+async def enqueue(
+    *,
+    session: AsyncSession = Depends(get_session),
+    response: Response,
+    player_id: Annotated[uuid.UUID, Body(embed=True)],
+) -> MatchStatus:
+    """Pairs the player with someone of a similar rating and creates their room.
+    Otherwise the player waits in the queue and gets 202 Accepted"""
+    room_id = matchmaking_queue.pop_match(player_id)
+    if room_id is not None:
+        return MatchStatus(room_id=room_id)
+    if matchmaking_queue.touch(player_id):
+        response.status_code = status.HTTP_202_ACCEPTED
+        return MatchStatus(room_id=None)
+
+    # Rated on the leaderboard, which lives on the same worker as the queue
+    stats = leaderboard.get(player_id)
+    rating = round(INITIAL_RATING if stats is None else stats.rating)
+    opponent = matchmaking_queue.pop_opponent(rating)
+    opponent_id, opponent_rating = opponent if opponent is not None else (None, 0)
+    ids = [player_id] if opponent_id is None else [player_id, opponent_id]
+    result = await session.execute(select(Player).where(Player.player_id.in_(ids)))
+    players = {player.get_player_id: player for player in result.scalars()}
+    if player_id not in players:
+        if opponent_id is not None:
+            matchmaking_queue.push(opponent_id, opponent_rating, front=True)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Player with given id not found",
+        )
+    if opponent_id is None or opponent_id not in players:
+        matchmaking_queue.push(player_id, rating)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return MatchStatus(room_id=None)
+
+    # The player who waited moves first, the room is created with both seats filled
+    room = Room(room_id=uuid.uuid4(), first_player=players[opponent_id])
+    room.add_player(players[player_id])
+    session.add(room)
+    try:
+        await session.commit()
+    except BaseException:
+        matchmaking_queue.push(opponent_id, opponent_rating, front=True)
+        raise
+    metrics.games_started.inc()
+    matchmaking_queue.set_match(opponent_id, room.get_room_id)
+    return MatchStatus(room_id=room.get_room_id)
+
+
+@router.get("/{player_id}", response_model=MatchStatus, status_code=status.HTTP_200_OK)
+async def get_match(
+    *, response: Response, player_id: Annotated[uuid.UUID, Path()]
+) -> MatchStatus:
+    """Returns the room found for a waiting player once, 202 while still waiting.
+    Players who stop asking leave the queue after app.matchmaking.MATCHMAKING_TTL"""
+    room_id = matchmaking_queue.pop_match(player_id)
+    if room_id is not None:
+        return MatchStatus(room_id=room_id)
+    if matchmaking_queue.touch(player_id):
+        response.status_code = status.HTTP_202_ACCEPTED
+        return MatchStatus(room_id=None)
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Player is not waiting for a match",
+    )
+
+
+@router.delete("/{player_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def leave(*, player_id: Annotated[uuid.UUID, Path()]) -> None:
+    if not matchmaking_queue.remove(player_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Player is not waiting for a match",
+        )
@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette import status
+
+from app import metrics
+
+router = APIRouter()
+
+
+@router.get(
+    "/metrics", response_class=PlainTextResponse, status_code=status.HTTP_200_OK
+)
+async def get_metrics() -> PlainTextResponse:
+    """Prometheus text exposition of the process metrics"""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
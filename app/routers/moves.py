@@ -0,0 +1,45 @@
+import json
+from typing import AsyncIterator
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from starlette import status
+
+from app.cache import room_cache
+from app.db import Session
+from app.models.move import Move
+
+router = APIRouter(prefix="/moves")
+
+EXPORT_BATCH = 1000
+
+
+async def _export_lines() -> AsyncIterator[str]:
+    # The export runs for as long as the client reads, so it owns its session
+    async with Session() as session:
+        result = await session.stream(
+            select(Move.room_id, Move.ply, Move.player_id, Move.cell, Move.created_at)
+            .order_by(Move.room_id, Move.ply)
+            .execution_options(yield_per=EXPORT_BATCH)
+        )
+        async for rows in result.partitions():
+            yield "".join(
+                json.dumps(
+                    {
+                        "room_id": str(row.room_id),
+                        "ply": row.ply,
+                        "player_id": str(row.player_id),
+                        "cell": row.cell,
+                        "created_at": row.created_at.isoformat(),
+                    }
+                )
+                + "\n"
+                for row in rows
+            )
+
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_moves() -> StreamingResponse:
+    """Every logged move as NDJSON ordered by room and ply, read through a server-side cursor"""
+    await room_cache.flush()
+    return StreamingResponse(_export_lines(), media_type="application/x-ndjson")
@@ -1,22 +1,63 @@
 from typing import Annotated
 import uuid
-from fastapi import APIRouter, Body, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Body, Depends, HTTPException, Path
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from app.db import get_session
+from app.leaderboard import leaderboard
 from app.models.player import Player
-
+from app.models.stats import INITIAL_RATING
+from app.schema import PlayerStatsSchema
 
 router = APIRouter(prefix="/players")
 
 
 @router.post("", response_model=uuid.UUID, status_code=status.HTTP_201_CREATED)
 async def create_player(
-    *, session: Session = Depends(get_session), name: Annotated[str, Body(embed=True)]
+    *,
+    session: AsyncSession = Depends(get_session),
+    name: Annotated[str, Body(embed=True)],
 ) -> uuid.UUID:
     player_id = uuid.uuid4()
     player = Player(player_id=player_id, name=name)
     session.add(player)
-    session.commit()
+    await session.commit()
     return player.get_player_id
+
+
+@router.get(
+    "/{player_id}/stats",
+    response_model=PlayerStatsSchema,
+    status_code=status.HTTP_200_OK,
+)
+async def get_stats(
+    *,
+    session: AsyncSession = Depends(get_session),
+    player_id: Annotated[uuid.UUID, Path()],
+) -> PlayerStatsSchema:
+    """Served from the in-memory leaderboard, the database is only asked about
+    players that never finished a game"""
+    stats = leaderboard.get(player_id)
+    if stats is not None:
+        return PlayerStatsSchema(
+            player_id=player_id,
+            wins=stats.wins,
+            losses=stats.losses,
+            draws=stats.draws,
+            rating=stats.rating,
+            rank=leaderboard.rank(stats),
+        )
+    if await session.get(Player, player_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Player with given id not found",
+        )
+    return PlayerStatsSchema(
+        player_id=player_id,
+        wins=0,
+        losses=0,
+        draws=0,
+        rating=INITIAL_RATING,
+        rank=None,
+    )
@@ -0,0 +1,28 @@
+from typing import Annotated
+from fastapi import APIRouter, Query
+from starlette import status
+
+from app.leaderboard import leaderboard
+from app.schema import PlayerStatsSchema
+
+router = APIRouter(prefix="/leaderboard")
+
+
+@router.get("", response_model=list[PlayerStatsSchema], status_code=status.HTTP_200_OK)
+async def get_leaderboard(
+    *,
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+    offset: Annotated[int, Query(ge=0)] = 0,
+) -> list[PlayerStatsSchema]:
+    """Players by rating, highest first"""
+    return [
+        PlayerStatsSchema(
+            player_id=stats.player_id,
+            wins=stats.wins,
+            losses=stats.losses,
+            draws=stats.draws,
+            rating=stats.rating,
+            rank=offset + position,
+        )
+        for position, stats in enumerate(leaderboard.top(limit, offset), start=1)
+    ]
@@ -1,13 +1,27 @@
-from typing import Annotated
+import asyncio
+from typing import Annotated, AsyncIterator
 import uuid
-from fastapi import APIRouter, Body, Depends, HTTPException, Path
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Path,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from app.db import get_session
+from app import metrics, solver
+from app.admission import admit
+from app.board import MAX_SIZE, SIZE, WIN_LENGTH
+from app.cache import room_cache
+from app.db import Session, get_session
+from app.engine import SEAT_SYMBOLS
 from app.exc import (
-    BoardStatesNotFound,
     DuplicatePlayer,
     IncorrectInput,
     InvalidPlay,
@@ -15,69 +29,116 @@ from app.exc import (
     RoomFull,
     RoomNotFull,
 )
+from app.models.archive import ArchivedRoom
+from app.models.move import Move
 from app.models.player import Player
-from app.models.room import NextTurn, Room, WinnerStates
-from app.schema import PlayInput, PlayerSchema
+from app.hub import hub
+from app.idempotency import move_requests
+from app.leaderboard import leaderboard
+from app.models.room import NextTurn, Room
+from app.responses import (
+    EncodedJSONResponse,
+    FastJSONResponse,
+    board_fields,
+    dumps,
+)
+from app.schema import (
+    BatchMove,
+    BoardUpdate,
+    MoveResult,
+    MoveSchema,
+    PlayInput,
+    PlayerSchema,
+)
 
 router = APIRouter(prefix="/rooms")
 
+SSE_KEEPALIVE = 15.0
+BATCH_CHUNK = 500
+
 
-@router.post("", response_model=uuid.UUID, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "",
+    response_model=uuid.UUID,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(admit)],
+)
 async def create_room(
     *,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     player_id: Annotated[uuid.UUID, Body(embed=True)],
+    size: Annotated[int, Body(ge=WIN_LENGTH, le=MAX_SIZE)] = SIZE,
+    win_length: Annotated[int, Body(ge=WIN_LENGTH)] = WIN_LENGTH,
 ) -> uuid.UUID:
+    if win_length > size:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail="Win length cannot exceed the board size",
+        )
     room_id = uuid.uuid4()
-    result = session.execute(select(Player).where(Player.player_id == player_id))
+    result = await session.execute(select(Player).where(Player.player_id == player_id))
     player = result.scalar()
     if player is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Player with given id not found",
         )
-    room = Room(room_id=room_id, first_player_id=player.get_player_id)
+    room = Room(
+        room_id=room_id,
+        first_player_id=player.get_player_id,
+        size=size,
+        win_length=win_length,
+    )
     session.add(room)
-    session.commit()
+    await session.commit()
+    metrics.games_started.inc()
     return room.get_room_id
 
 
-@router.put("/{room_id}/players/add", status_code=status.HTTP_204_NO_CONTENT)
+@router.put(
+    "/{room_id}/players/add",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(admit)],
+)
 async def add_player(
     *,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     room_id: Annotated[uuid.UUID, Path()],
     player_id: Annotated[uuid.UUID, Body(embed=True)],
 ) -> None:
-    result = session.execute(select(Room).where(Room.room_id == room_id))
-    room = result.scalar()
-    if room is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Room with given id not found",
-        )
+    # Seating changes go straight to the database, the cache stays out until committed
+    async with room_cache.hold(room_id):
+        result = await session.execute(select(Room).where(Room.room_id == room_id))
+        room = result.scalar()
+        if room is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Room with given id not found",
+            )
 
-    result = session.execute(select(Player).where(Player.player_id == player_id))
-    player = result.scalar()
-    if player is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Player with given id not found",
+        result = await session.execute(
+            select(Player).where(Player.player_id == player_id)
         )
+        player = result.scalar()
+        if player is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Player with given id not found",
+            )
 
-    try:
-        room.add_player(player)
-    except RoomFull:
-        raise HTTPException(
-            status_code=status.HTTP_406_NOT_ACCEPTABLE,
-            detail="Room cannot have more than two players",
-        )
-    except DuplicatePlayer:
-        raise HTTPException(
-            status_code=status.HTTP_406_NOT_ACCEPTABLE,
-            detail="Room cannot have multiple instances of the same player",
-        )
-    session.commit()
+        try:
+            room.add_player(player)
+        except RoomFull:
+            raise HTTPException(
+                status_code=status.HTTP_406_NOT_ACCEPTABLE,
+                detail="Room cannot have more than two players",
+            )
+        except DuplicatePlayer:
+            raise HTTPException(
+                status_code=status.HTTP_406_NOT_ACCEPTABLE,
+                detail="Room cannot have multiple instances of the same player",
+            )
+        await session.commit()
 
 
 @router.get(
@@ -85,16 +146,10 @@ async def add_player(
     response_model=list[PlayerSchema],
     status_code=status.HTTP_200_OK,
 )
-async def get_players(
-    *, session: Session = Depends(get_session), room_id: Annotated[uuid.UUID, Path()]
-) -> list[Player]:
-    result = session.execute(select(Room).where(Room.room_id == room_id))
-    room = result.scalar()
+async def get_players(*, room_id: Annotated[uuid.UUID, Path()]) -> FastJSONResponse:
+    room = await room_cache.get(room_id)
     if room is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Room with given id not found",
-        )
+        return FastJSONResponse(await _archived_players(room_id))
 
     try:
         room.is_full()
@@ -104,38 +159,168 @@ async def get_players(
             detail="Room is required to have two players",
         )
 
-    response: list[Player] = [room.first_player, room.second_player]
-    return response
+    # Built from trusted columns, so the PlayerSchema validation is skipped
+    response = [
+        {
+            "player_id": str(player.get_player_id),
+            "name": player.name,
+            "symbol": room.symbol_of(player),
+        }
+        for player in (room.first_player, room.second_player)
+    ]
+    return FastJSONResponse(response)
 
 
 @router.put(
     "/{room_id}/board",
     response_model=list[list[str]],
     status_code=status.HTTP_200_OK,
+    dependencies=[Depends(admit)],
 )
 async def make_play(
     *,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
     room_id: Annotated[uuid.UUID, Path()],
     input: Annotated[PlayInput, Body()],
-) -> list[list[str]]:
-    result = session.execute(select(Room).where(Room.room_id == room_id))
-    room = result.scalar()
+) -> EncodedJSONResponse:
+    async def play() -> bytes:
+        room = await room_cache.get(room_id)
+        if room is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Room with given id not found",
+            )
+
+        finished = await _apply_move(session, room, input)
+        await _after_move(room_id, room, finished)
+        return _board_bytes(room)
+
+    if input.request_id is None:
+        return EncodedJSONResponse(await play())
+    # Keyed per room and player so ids from different clients never collide
+    key = (room_id, input.player_id, input.request_id)
+    return EncodedJSONResponse(await move_requests.run(key, play))
+
+
+@router.post(
+    "/{room_id}/ai-move",
+    response_model=list[list[str]],
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(admit)],
+)
+async def make_ai_play(
+    *,
+    session: AsyncSession = Depends(get_session),
+    room_id: Annotated[uuid.UUID, Path()],
+) -> EncodedJSONResponse:
+    """Plays the perfect move for whichever player is active, looked up in the solver table"""
+    room = await room_cache.get(room_id)
     if room is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Room with given id not found",
         )
+    try:
+        room.is_full()
+    except RoomNotFull:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Room is required to have two players",
+        )
 
-    result = session.execute(select(Player).where(Player.player_id == input.player_id))
-    player = result.scalar()
+    board = room.copy_board()
+    if not solver.supports(board):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="AI play is only available on the classic 3x3 board",
+        )
+
+    player = room.active_player
+    opponent = room.second_player if player is room.first_player else room.first_player
+    move = None
+    if room.get_result() == NextTurn.YES:
+        move = solver.best_move(board, room.symbol_of(player), room.symbol_of(opponent))
+    if move is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The game is already finished",
+        )
+    row, col = move
+    input = PlayInput(player_id=player.get_player_id, row=row, col=col)
+    finished = await _apply_move(session, room, input)
+    await _after_move(room_id, room, finished)
+    return EncodedJSONResponse(_board_bytes(room))
+
+
+@router.post(
+    "/moves",
+    response_model=list[MoveResult],
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(admit)],
+)
+async def make_plays(
+    *,
+    session: AsyncSession = Depends(get_session),
+    moves: Annotated[list[BatchMove], Body()],
+) -> list[MoveResult]:
+    """Applies moves across many rooms in order, one result per move.
+    Rooms are handled in chunks, each written back in a single transaction"""
+    by_room: dict[uuid.UUID, list[int]] = {}
+    for index, move in enumerate(moves):
+        by_room.setdefault(move.room_id, []).append(index)
+
+    results: dict[int, MoveResult] = {}
+    room_ids = list(by_room)
+    for start in range(0, len(room_ids), BATCH_CHUNK):
+        chunk = room_ids[start : start + BATCH_CHUNK]
+        rooms = await room_cache.get_many(chunk)
+        for room_id in chunk:
+            room = rooms.get(room_id)
+            for index in by_room[room_id]:
+                if room is None:
+                    results[index] = MoveResult(
+                        room_id=room_id,
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Room with given id not found",
+                    )
+                    continue
+                try:
+                    await _apply_move(session, room, moves[index])
+                except HTTPException as e:
+                    results[index] = MoveResult(
+                        room_id=room_id, status_code=e.status_code, detail=e.detail
+                    )
+                    continue
+                results[index] = MoveResult(
+                    room_id=room_id, status_code=status.HTTP_200_OK
+                )
+        await room_cache.flush(chunk)
+        for room in rooms.values():
+            if hub.has_subscribers(room.room_id):
+                hub.publish(room.room_id, _encode_update(room))
+    return [results[index] for index in range(len(moves))]
+
+
+async def _apply_move(
+    session: AsyncSession, room: Room, input: PlayInput | BatchMove
+) -> bool:
+    player = room.get_player(input.player_id)
     if player is None:
+        # Only players seated in the room may move, the lookup just picks the error
+        result = await session.execute(
+            select(Player.player_id).where(Player.player_id == input.player_id)
+        )
+        if result.scalar() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Player with given id not found",
+            )
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Player with given id not found",
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Player tried acting outside their turn",
         )
     try:
-        room.make_play(player, input.row, input.col)
+        finished = room.make_play(player, input.row, input.col)
     except OutOfOrder:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -151,8 +336,68 @@ async def make_play(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Player attempted an impossible play",
         )
-    session.commit()
-    return room.print_board()
+    except RoomNotFull:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Room is required to have two players",
+        )
+    room_cache.record_move(room, input.player_id, input.row, input.col)
+    metrics.moves_applied.inc()
+    if finished:
+        metrics.games_finished.inc(room.compare_board_states().value)
+        leaderboard.submit(
+            room.first_player_id, room.second_player_id, room.winner_player_id
+        )
+    return finished
+
+
+async def _after_move(room_id: uuid.UUID, room: Room, finished: bool) -> None:
+    if finished:
+        # Finished games are written through instead of waiting for the next flush
+        await room_cache.flush([room_id])
+    if hub.has_subscribers(room_id):
+        hub.publish(room_id, _encode_update(room))
+
+
+@router.get(
+    "/{room_id}/moves",
+    response_model=list[MoveSchema],
+    status_code=status.HTTP_200_OK,
+)
+async def get_moves(
+    *,
+    session: AsyncSession = Depends(get_session),
+    room_id: Annotated[uuid.UUID, Path()],
+) -> list[MoveSchema]:
+    room = await room_cache.get(room_id)
+    if room is not None:
+        size = room.size
+        # Moves still waiting for write-behind have to reach the log first
+        await room_cache.flush([room_id])
+    else:
+        # Finished games reaped into the archive keep their move log
+        result = await session.execute(
+            select(ArchivedRoom.size).where(ArchivedRoom.room_id == room_id)
+        )
+        size = result.scalar()
+        if size is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Room with given id not found",
+            )
+    result = await session.execute(
+        select(Move).where(Move.room_id == room_id).order_by(Move.ply)
+    )
+    return [
+        MoveSchema(
+            ply=move.ply,
+            player_id=move.player_id,
+            row=move.cell // size + 1,
+            col=move.cell % size + 1,
+            created_at=move.created_at,
+        )
+        for move in result.scalars()
+    ]
 
 
 @router.get(
@@ -160,32 +405,140 @@ async def make_play(
     response_model=uuid.UUID | NextTurn,
     status_code=status.HTTP_200_OK,
 )
-async def decide_result(
-    *, session: Session = Depends(get_session), room_id: Annotated[uuid.UUID, Path()]
-) -> uuid.UUID | NextTurn:
+async def decide_result(*, room_id: Annotated[uuid.UUID, Path()]) -> FastJSONResponse:
     """Function returns a player id if any player is declared winner.
     In case of a stalemate or a turn not ending the game, returns a NextTurn specifying
     whether to continue the game or not"""
-    result = session.execute(select(Room).where(Room.room_id == room_id))
-    room = result.scalar()
-    if room is None:
+    room = await room_cache.get(room_id)
+    if room is not None:
+        result = room.get_result()
+    else:
+        archived = await _archived_room(room_id)
+        # Only finished games are archived
+        result = archived.winner_player_id or NextTurn.NO
+    return FastJSONResponse(str(result) if isinstance(result, uuid.UUID) else result)
+
+
+async def _archived_room(room_id: uuid.UUID) -> ArchivedRoom:
+    """Finished game reaped out of rooms, 404 when there is none either"""
+    async with Session() as session:
+        archived = await session.get(ArchivedRoom, room_id)
+    if archived is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Room with given id not found",
         )
-    result = room.compare_board_states()
+    return archived
+
+
+async def _archived_players(room_id: uuid.UUID) -> list[dict]:
+    archived = await _archived_room(room_id)
+    seats = (archived.first_player_id, archived.second_player_id)
+    async with Session() as session:
+        result = await session.execute(
+            select(Player.player_id, Player.name).where(Player.player_id.in_(seats))
+        )
+        names = {player_id: name for player_id, name in result}
+    return [
+        {"player_id": str(player_id), "name": names.get(player_id), "symbol": symbol}
+        for player_id, symbol in zip(seats, SEAT_SYMBOLS)
+    ]
+
+
+def _board_bytes(room: Room) -> bytes:
+    return board_fields(room.board, room.size, room.win_length)
+
+
+def _encode_update(room: Room) -> str:
+    result = room.get_result()
+    update = {
+        "board": room.copy_board().fields,
+        "result": str(result) if isinstance(result, uuid.UUID) else result,
+    }
+    return dumps(update).decode()
+
+
+async def _load_update(room_id: uuid.UUID) -> str | None:
+    room = await room_cache.get(room_id)
+    if room is None:
+        return None
+    return _encode_update(room)
+
+
+def _is_finished(message: str) -> bool:
+    return BoardUpdate.model_validate_json(message).result != NextTurn.YES
+
+
+@router.websocket("/{room_id}/ws")
+async def subscribe_ws(websocket: WebSocket, room_id: uuid.UUID) -> None:
+    """Pushes the board and the result after every move, starting with the current state"""
+    queue = hub.subscribe(room_id)
+    receiving: asyncio.Future | None = None
+    getting: asyncio.Future | None = None
     try:
-        match result:
-            case WinnerStates.NONE:
-                return NextTurn.YES
-            case WinnerStates.FIRST:
-                return room.first_player.get_player_id
-            case WinnerStates.SECOND:
-                return room.second_player.get_player_id
-            case WinnerStates.STALEMATE:
-                return NextTurn.NO
-    except BoardStatesNotFound:
+        snapshot = await _load_update(room_id)
+        if snapshot is None:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+        await websocket.accept()
+        # Clients send nothing, listening is how a closed socket gets noticed
+        receiving = asyncio.ensure_future(websocket.receive())
+        message = snapshot
+        while True:
+            await websocket.send_text(message)
+            if _is_finished(message):
+                await websocket.close()
+                return
+            getting = asyncio.ensure_future(queue.get())
+            while not getting.done():
+                await asyncio.wait(
+                    (getting, receiving), return_when=asyncio.FIRST_COMPLETED
+                )
+                if receiving.done():
+                    if receiving.result()["type"] == "websocket.disconnect":
+                        return
+                    receiving = asyncio.ensure_future(websocket.receive())
+            message = getting.result()
+            if message is None:
+                # The room moved to another process, the client reconnects there
+                await websocket.close(code=status.WS_1012_SERVICE_RESTART)
+                return
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in (receiving, getting):
+            if task is not None:
+                task.cancel()
+        hub.unsubscribe(room_id, queue)
+
+
+@router.get("/{room_id}/events", status_code=status.HTTP_200_OK)
+async def subscribe_sse(*, room_id: Annotated[uuid.UUID, Path()]) -> StreamingResponse:
+    """Server-Sent Events fallback for clients that cannot open a WebSocket"""
+    queue = hub.subscribe(room_id)
+    snapshot = await _load_update(room_id)
+    if snapshot is None:
+        hub.unsubscribe(room_id, queue)
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to find the board states",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Room with given id not found",
         )
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            message = snapshot
+            yield f"data: {message}\n\n"
+            while not _is_finished(message):
+                try:
+                    message = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    # The room moved to another process, EventSource reconnects
+                    return
+                yield f"data: {message}\n\n"
+        finally:
+            hub.unsubscribe(room_id, queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
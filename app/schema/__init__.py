@@ -1 +1,11 @@
-from app.schema.schema import PlayerSchema, PlayInput
+from app.schema.schema import (
+    BatchMove,
+    BoardUpdate,
+    GameResult,
+    MatchStatus,
+    MoveResult,
+    MoveSchema,
+    PlayerSchema,
+    PlayerStatsSchema,
+    PlayInput,
+)
@@ -1,6 +1,9 @@
+from datetime import datetime
 import uuid
 from pydantic import BaseModel
 
+from app.models.room import NextTurn
+
 
 class PlayerSchema(BaseModel):
     player_id: uuid.UUID
@@ -12,3 +15,50 @@ class PlayInput(BaseModel):
     player_id: uuid.UUID
     row: int
     col: int
+    # Optional idempotency key, a retry with the same one replays the first response
+    request_id: uuid.UUID | None = None
+
+
+class BoardUpdate(BaseModel):
+    board: list[list[str]]
+    result: uuid.UUID | NextTurn
+
+
+class BatchMove(BaseModel):
+    room_id: uuid.UUID
+    player_id: uuid.UUID
+    row: int
+    col: int
+
+
+class MoveResult(BaseModel):
+    room_id: uuid.UUID
+    status_code: int
+    detail: str | None = None
+
+
+class MoveSchema(BaseModel):
+    ply: int
+    player_id: uuid.UUID
+    row: int
+    col: int
+    created_at: datetime
+
+
+class GameResult(BaseModel):
+    first_player_id: uuid.UUID
+    second_player_id: uuid.UUID
+    winner_player_id: uuid.UUID | None
+
+
+class MatchStatus(BaseModel):
+    room_id: uuid.UUID | None
+
+
+class PlayerStatsSchema(BaseModel):
+    player_id: uuid.UUID
+    wins: int
+    losses: int
+    draws: int
+    rating: float
+    rank: int | None
@@ -0,0 +1,116 @@
+"""Self-play simulator running games on the engine across worker processes.
+
+Each seat follows a policy, "random" plays a uniformly random free cell and "solver"
+plays perfectly (classic 3x3 board only). Prints games per second and the outcome
+distribution as JSON:
+
+    python -m app.selfplay --games 1000000 --first random --second solver
+"""
+
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import random
+import time
+
+from app import solver
+from app.board import SIZE, WIN_LENGTH, Board
+from app.engine import SEAT_SYMBOLS, WinnerStates
+
+POLICIES = ("random", "solver")
+
+# Games per task handed to a worker, large enough to amortize the pickling
+CHUNK_SIZE = 10000
+
+
+def play(
+    rng: random.Random,
+    policies: tuple[str, str],
+    size: int = SIZE,
+    win_length: int = WIN_LENGTH,
+) -> WinnerStates:
+    board = Board(size=size, win_length=win_length)
+    free = [(row, col) for row in range(1, size + 1) for col in range(1, size + 1)]
+    for ply in range(size * size):
+        seat = ply % 2
+        symbol = SEAT_SYMBOLS[seat]
+        if policies[seat] == "solver":
+            move = solver.best_move(board, symbol, SEAT_SYMBOLS[1 - seat])
+            free.remove(move)
+        else:
+            # Swap-remove keeps picking a random free cell O(1)
+            index = rng.randrange(len(free))
+            free[index], free[-1] = free[-1], free[index]
+            move = free.pop()
+        if board.edit_field(symbol, *move):
+            return WinnerStates.FIRST if seat == 0 else WinnerStates.SECOND
+    return WinnerStates.STALEMATE
+
+
+def play_many(
+    games: int, seed: int, policies: tuple[str, str], size: int, win_length: int
+) -> Counter[WinnerStates]:
+    rng = random.Random(seed)
+    return Counter(play(rng, policies, size, win_length) for _ in range(games))
+
+
+def simulate(
+    games: int,
+    policies: tuple[str, str],
+    size: int = SIZE,
+    win_length: int = WIN_LENGTH,
+    workers: int | None = None,
+    seed: int = 0,
+) -> Counter[WinnerStates]:
+    chunks = [min(CHUNK_SIZE, games - start) for start in range(0, games, CHUNK_SIZE)]
+    totals: Counter[WinnerStates] = Counter()
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(play_many, count, seed + i, policies, size, win_length)
+            for i, count in enumerate(chunks)
+        ]
+        for future in futures:
+            totals.update(future.result())
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--first", choices=POLICIES, default="random")
+    parser.add_argument("--second", choices=POLICIES, default="random")
+    parser.add_argument("--size", type=int, default=SIZE)
+    parser.add_argument("--win-length", type=int, default=WIN_LENGTH)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    policies = (args.first, args.second)
+    if "solver" in policies and (args.size, args.win_length) != (3, 3):
+        parser.error("The solver policy only plays the classic 3x3 board")
+
+    start = time.perf_counter()
+    outcomes = simulate(
+        args.games, policies, args.size, args.win_length, args.workers, args.seed
+    )
+    duration = time.perf_counter() - start
+    print(
+        json.dumps(
+            {
+                "games": args.games,
+                "duration_s": duration,
+                "games_per_s": args.games / duration,
+                "outcomes": {
+                    state.value: outcomes[state] / args.games
+                    for state in (
+                        WinnerStates.FIRST,
+                        WinnerStates.SECOND,
+                        WinnerStates.STALEMATE,
+                    )
+                },
+            },
+            indent=2,
+        )
+    )
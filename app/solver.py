@@ -0,0 +1,55 @@
+from functools import cache
+from app.board import Board, geometry
+
+# Position -> (score, best cell), keyed by the masks of the player to move and the opponent
+Table = dict[tuple[int, int], tuple[int, int | None]]
+
+# Perfect play is only tabulated for the classic game
+LAYOUT = geometry(3, 3)
+
+
+def _solve(table: Table, mine: int, theirs: int) -> int:
+    """Negamax score for the player to move, wins found sooner score higher"""
+    key = (mine, theirs)
+    if key in table:
+        return table[key][0]
+
+    free = LAYOUT.full & ~(mine | theirs)
+    if LAYOUT.has_line(theirs):
+        table[key] = (-(free.bit_count() + 1), None)
+        return table[key][0]
+    if not free:
+        table[key] = (0, None)
+        return 0
+
+    best_score, best_cell = -LAYOUT.size * LAYOUT.size - 2, None
+    moves = free
+    while moves:
+        bit = moves & -moves
+        moves &= moves - 1
+        score = -_solve(table, theirs, mine | bit)
+        if score > best_score:
+            best_score, best_cell = score, bit.bit_length() - 1
+    table[key] = (best_score, best_cell)
+    return best_score
+
+
+@cache
+def table() -> Table:
+    """Every position reachable from an empty board, built once per process"""
+    result: Table = {}
+    _solve(result, 0, 0)
+    return result
+
+
+def supports(board: Board) -> bool:
+    return board.size == LAYOUT.size and board.win_length == LAYOUT.win_length
+
+
+def best_move(board: Board, symbol: str, opponent: str) -> tuple[int, int] | None:
+    """Perfect play for symbol as 1-based (row, col), None once the game is over"""
+    cell = table()[(board.mask(symbol), board.mask(opponent))][1]
+    if cell is None:
+        return None
+    row, col = LAYOUT.position(cell)
+    return row + 1, col + 1
@@ -0,0 +1,133 @@
+"""Micro-benchmarks of the game engine hot paths with saved baselines.
+
+Each case is timed as the median per-call time over many repeats and compared with
+bench/baselines.json, the run fails when any case is slower than baseline * threshold
+by more than a fixed floor, which keeps sub-microsecond cases from failing on noise:
+
+    python -m bench.engine                 # compare against the saved baselines
+    python -m bench.engine --save          # record new baselines on this machine
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import timeit
+from typing import Callable
+import uuid
+
+from app.board import Board
+from app.models import Player, Room
+from app.models.room import ActiveState, GameStatus
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+# Boards as JSON grids, with a free cell (or None) for the move benchmarks
+POSITIONS: dict[str, tuple[str, tuple[int, int] | None]] = {
+    "empty": ('[[" ", " ", " "], [" ", " ", " "], [" ", " ", " "]]', (2, 2)),
+    "mid": ('[["X", "O", " "], [" ", "X", " "], [" ", " ", " "]]', (3, 1)),
+    "won": ('[["X", "X", "X"], ["O", "O", " "], [" ", " ", " "]]', (3, 3)),
+    "full": ('[["X", "O", "X"], ["X", "O", "O"], ["O", "X", "X"]]', None),
+}
+
+
+def _room(fields: str) -> tuple[Room, Player]:
+    first = Player(player_id=uuid.uuid4(), name="first")
+    second = Player(player_id=uuid.uuid4(), name="second")
+    room = Room(room_id=uuid.uuid4(), first_player=first, size=3, win_length=3)
+    room.add_player(second)
+    room.update_board(Board.from_json(fields))
+    room.active_player_state = ActiveState.FIRST
+    return room, first
+
+
+def cases() -> dict[str, Callable[[], object]]:
+    result: dict[str, Callable[[], object]] = {}
+    for name, (fields, move) in POSITIONS.items():
+        board = Board.from_json(fields)
+        room, player = _room(fields)
+
+        result[f"Board.fields[{name}]"] = lambda board=board: board.fields
+        result[f"Board.check_victory[{name}]"] = (
+            lambda board=board: board.check_victory("X")
+        )
+        result[f"Board.check_stalemate[{name}]"] = board.check_stalemate
+        result[f"Room.compare_board_states[{name}]"] = room.compare_board_states
+        if move is None:
+            continue
+
+        def edit_field(board=board, move=move) -> None:
+            # A fresh copy of the masks every call, the edit itself is what is timed
+            Board({"X": board.mask("X"), "O": board.mask("O")}).edit_field("X", *move)
+
+        def make_play(room=room, player=player, stored=room.board, move=move) -> None:
+            room.board = stored
+            room.active_player_state = ActiveState.FIRST
+            room.status = GameStatus.ACTIVE
+            room.make_play(player, *move)
+
+        result[f"Board.edit_field[{name}]"] = edit_field
+        result[f"Room.make_play[{name}]"] = make_play
+    return result
+
+
+def measure(function: Callable[[], object], repeat: int) -> float:
+    """Median seconds per call over repeats of about 50 ms each"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    # autorange aims at 0.2 s, shorter repeats leave room for many more of them
+    number = max(1, number // 4)
+    return statistics.median(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def main(args: argparse.Namespace) -> int:
+    results = {
+        name: measure(function, args.repeat) for name, function in cases().items()
+    }
+
+    if args.save:
+        with open(BASELINES, "w") as file:
+            json.dump(
+                {name: seconds * 1e9 for name, seconds in results.items()},
+                file,
+                indent=2,
+            )
+            file.write("\n")
+        print(f"Saved {len(results)} baselines to {BASELINES}")
+        return 0
+
+    with open(BASELINES) as file:
+        baselines: dict[str, float] = json.load(file)
+    failed = False
+    for name, seconds in results.items():
+        nanoseconds = seconds * 1e9
+        baseline = baselines.get(name)
+        if baseline is None:
+            print(f"{name:45} {nanoseconds:10.0f} ns  (no baseline)")
+            continue
+        ratio = nanoseconds / baseline
+        regressed = nanoseconds > baseline * args.threshold + args.floor
+        failed |= regressed
+        mark = "REGRESSED" if regressed else "ok"
+        print(f"{name:45} {nanoseconds:10.0f} ns  x{ratio:5.2f}  {mark}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--save", action="store_true", help="Record new baselines")
+    parser.add_argument("--repeat", type=int, default=25)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.5,
+        help="Fail when a case is slower than baseline times this",
+    )
+    parser.add_argument(
+        "--floor",
+        type=float,
+        default=250.0,
+        help="Nanoseconds a case may exceed the threshold by without failing",
+    )
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,209 @@
+"""End-to-end load test of app.main.app over real HTTP.
+
+Simulates concurrent games of create player -> create room -> add player -> alternate
+PUT/GET /rooms/{room_id}/board until the game is decided, then writes a JSON report
+with throughput and latency percentiles per endpoint, meant to be diffed between releases.
+
+Without --base-url a uvicorn server is started against a throwaway SQLite database:
+
+    python -m bench.loadtest --games 200 --concurrency 50 --output report.json
+"""
+
+import argparse
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import AsyncIterator
+
+import httpx
+
+SIZE = 3
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def request(
+        self, client: httpx.AsyncClient, method: str, route: str, url: str, **kwargs
+    ) -> httpx.Response:
+        endpoint = f"{method} {route}"
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        if response.is_error:
+            self.errors[endpoint] += 1
+        return response
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted samples"""
+    index = max(0, min(len(samples) - 1, math.ceil(fraction * len(samples)) - 1))
+    return samples[index]
+
+
+async def play_game(client: httpx.AsyncClient, recorder: Recorder) -> None:
+    players = []
+    for name in ("first", "second"):
+        response = await recorder.request(
+            client, "POST", "/players", "/players", json={"name": name}
+        )
+        players.append(response.json())
+    response = await recorder.request(
+        client, "POST", "/rooms", "/rooms", json={"player_id": players[0]}
+    )
+    room_id = response.json()
+    await recorder.request(
+        client,
+        "PUT",
+        "/rooms/{room_id}/players/add",
+        f"/rooms/{room_id}/players/add",
+        json={"player_id": players[1]},
+    )
+
+    free = [(row, col) for row in range(1, SIZE + 1) for col in range(1, SIZE + 1)]
+    random.shuffle(free)
+    turn = 0
+    while free:
+        row, col = free.pop()
+        await recorder.request(
+            client,
+            "PUT",
+            "/rooms/{room_id}/board",
+            f"/rooms/{room_id}/board",
+            json={"player_id": players[turn % 2], "row": row, "col": col},
+        )
+        response = await recorder.request(
+            client, "GET", "/rooms/{room_id}/board", f"/rooms/{room_id}/board"
+        )
+        if response.json() != "YES":
+            return
+        turn += 1
+
+
+async def run(base_url: str, games: int, concurrency: int) -> dict:
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+
+        async def bounded() -> None:
+            async with semaphore:
+                await play_game(client, recorder)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(bounded() for _ in range(games)))
+        duration = time.perf_counter() - start
+
+    endpoints = {}
+    for endpoint, samples in sorted(recorder.latencies.items()):
+        samples.sort()
+        endpoints[endpoint] = {
+            "count": len(samples),
+            "errors": recorder.errors[endpoint],
+            "mean_ms": sum(samples) / len(samples) * 1000,
+            "p50_ms": percentile(samples, 0.50) * 1000,
+            "p95_ms": percentile(samples, 0.95) * 1000,
+            "p99_ms": percentile(samples, 0.99) * 1000,
+        }
+    requests = sum(endpoint["count"] for endpoint in endpoints.values())
+    return {
+        "games": games,
+        "concurrency": concurrency,
+        "duration_s": duration,
+        "requests": requests,
+        "throughput_rps": requests / duration,
+        "games_per_s": games / duration,
+        "endpoints": endpoints,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _create_schema(database_url: str) -> None:
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from app.models import Base
+
+    engine = create_async_engine(database_url)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
+
+@asynccontextmanager
+async def local_server() -> AsyncIterator[str]:
+    """uvicorn serving app.main.app on a throwaway SQLite database"""
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite+aiosqlite:///{directory}/loadtest.db"
+        await _create_schema(database_url)
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+            # One client address drives every game, admission limits would throttle it
+            env={
+                "RATE_LIMIT_IP": "1000000",
+                "RATE_LIMIT_IP_BURST": "1000000",
+                "RATE_LIMIT_PLAYER": "1000000",
+                "RATE_LIMIT_PLAYER_BURST": "1000000",
+                "MAX_CONCURRENCY": "1000000",
+                **os.environ,
+                "DATABASE_URL": database_url,
+            },
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            async with httpx.AsyncClient(base_url=base_url) as client:
+                for _ in range(100):
+                    try:
+                        await client.get("/docs")
+                        break
+                    except httpx.TransportError:
+                        await asyncio.sleep(0.1)
+                else:
+                    raise RuntimeError("The server did not start")
+            yield base_url
+        finally:
+            server.terminate()
+            server.wait()
+
+
+async def main(args: argparse.Namespace) -> dict:
+    if args.base_url:
+        return await run(args.base_url, args.games, args.concurrency)
+    async with local_server() as base_url:
+        return await run(base_url, args.games, args.concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--base-url", help="Target a running server instead")
+    parser.add_argument("--output", help="Write the JSON report here, not to stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(encoded + "\n")
+    else:
+        print(encoded)
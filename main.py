@@ -1,4 +1,5 @@
-from app.exc import IncorrectInput, InvalidPlay, OutOfOrder
+from app.engine import WinnerStates
+from app.exc import IncorrectInput, InvalidPlay, OutOfOrder, RoomNotFull
 from app.player import Player
 from app.room import Room
 
@@ -10,12 +11,13 @@ def main(room: Room) -> None:
 
         move_result = False
         while move_result is False:
-            room.print_board()
+            for row in room.print_board():
+                print("|".join(row))
             try:
                 try:
                     print("Select row first, then column (Pick from 1 to 3): ")
-                    row = int(input()) - 1
-                    col = int(input()) - 1
+                    row = int(input())
+                    col = int(input())
                 except ValueError:
                     raise IncorrectInput("The input was not a number")
                 room.make_play(active_player, row, col)
@@ -28,7 +30,14 @@ def main(room: Room) -> None:
                 print("Please interact when it's your turn!")
             else:
                 move_result = True
-        if room.check_board_state(active_player):
+        result = room.compare_board_states()
+        if result is not WinnerStates.NONE:
+            for row in room.print_board():
+                print("|".join(row))
+            if result is WinnerStates.STALEMATE:
+                print("It's a stalemate!")
+            else:
+                print(f"{active_player.name} won!")
             break
 
 
@@ -39,8 +48,9 @@ if __name__ == "__main__":
     room = Room(1, player1)
     room.add_player(player2)
 
-    if room.is_full():
-
-        main(room)
-    else:
+    try:
+        room.is_full()
+    except RoomNotFull:
         print("Cannot start a game without a second player!")
+    else:
+        main(room)
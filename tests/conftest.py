@@ -0,0 +1,61 @@
+import os
+import tempfile
+from typing import AsyncIterator
+
+import httpx
+import pytest
+
+# app.db reads the URL on import, so it is pointed at a throwaway SQLite file first
+_directory = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_directory.name}/test.db"
+
+from app.db import engine  # noqa: E402
+from app.main import app as application  # noqa: E402
+from app.models import Base  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def app(anyio_backend):
+    """Schema and lifespan are set up once, every test runs on the same event loop"""
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    async with application.router.lifespan_context(application):
+        yield application
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client(app) -> AsyncIterator[httpx.AsyncClient]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def create_player(client):
+    async def create(name: str = "player") -> str:
+        response = await client.post("/players", json={"name": name})
+        assert response.status_code == 201
+        return response.json()
+
+    return create
+
+
+@pytest.fixture
+async def room(client, create_player) -> tuple[str, str, str]:
+    """A full room, as (room id, first player id, second player id)"""
+    first = await create_player("first")
+    second = await create_player("second")
+    response = await client.post("/rooms", json={"player_id": first})
+    assert response.status_code == 201
+    room_id = response.json()
+    response = await client.put(
+        f"/rooms/{room_id}/players/add", json={"player_id": second}
+    )
+    assert response.status_code == 204
+    return room_id, first, second
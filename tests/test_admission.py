@@ -0,0 +1,40 @@
+import uuid
+
+import pytest
+
+from app import admission
+from app.admission import ConcurrencyLimiter, RateLimiter
+
+pytestmark = pytest.mark.anyio
+
+
+def test_bucket_allows_the_burst_then_rejects():
+    limiter = RateLimiter(rate=1, burst=3)
+    assert [limiter.allow("key") for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow("other")
+
+
+def test_concurrency_limiter():
+    limiter = ConcurrencyLimiter(1)
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    limiter.release()
+    assert limiter.try_acquire()
+
+
+async def test_player_limit_covers_every_spelling_of_the_id(
+    client, create_player, monkeypatch
+):
+    monkeypatch.setattr(admission, "player_limiter", RateLimiter(rate=0.001, burst=1))
+    player_id = uuid.UUID(await create_player())
+    response = await client.post("/rooms", json={"player_id": str(player_id)})
+    assert response.status_code == 201
+    for spelling in (
+        str(player_id).upper(),
+        player_id.hex,
+        "{%s}" % player_id,
+        player_id.urn,
+    ):
+        response = await client.post("/rooms", json={"player_id": spelling})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1"
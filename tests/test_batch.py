@@ -0,0 +1,63 @@
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app.db import Session
+from app.models.move import Move
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("chunk", [1, 500])
+async def test_moves_across_rooms_are_applied_in_order(
+    client, room, create_player, monkeypatch, chunk
+):
+    monkeypatch.setattr("app.routers.rooms.BATCH_CHUNK", chunk)
+    room_id, first, second = room
+    other = await create_player("other")
+    response = await client.post("/rooms", json={"player_id": other})
+    other_room_id = response.json()
+    missing_room_id = str(uuid.uuid4())
+
+    moves = [
+        (room_id, first, 1, 1),
+        (other_room_id, other, 1, 1),
+        (room_id, second, 1, 1),
+        (room_id, second, 2, 2),
+        (missing_room_id, first, 1, 1),
+        (room_id, first, 4, 4),
+        (room_id, first, 1, 2),
+    ]
+    response = await client.post(
+        "/rooms/moves",
+        json=[
+            {"room_id": room, "player_id": player, "row": row, "col": col}
+            for room, player, row, col in moves
+        ],
+    )
+    assert response.status_code == 200
+    results = response.json()
+    assert [result["room_id"] for result in results] == [move[0] for move in moves]
+    assert [result["status_code"] for result in results] == [
+        200,
+        400,
+        400,
+        200,
+        404,
+        406,
+        200,
+    ]
+
+    # Each chunk is written back before the response
+    async with Session() as session:
+        result = await session.execute(
+            select(func.count()).where(Move.room_id == uuid.UUID(room_id))
+        )
+        assert result.scalar() == 3
+    response = await client.get(f"/rooms/{room_id}/moves")
+    assert [(move["row"], move["col"]) for move in response.json()] == [
+        (1, 1),
+        (2, 2),
+        (1, 2),
+    ]
@@ -0,0 +1,103 @@
+import random
+
+import pytest
+
+from app.board import MAX_SIZE, Board
+from app.codec import SYMBOLS
+from app.exc import IncorrectInput, InvalidPlay
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize(
+    "cells",
+    [
+        [(2, 1), (2, 2), (2, 3), (2, 4)],
+        [(1, 5), (2, 5), (3, 5), (4, 5)],
+        [(2, 2), (3, 3), (4, 4), (5, 5)],
+        [(1, 4), (2, 3), (3, 2), (4, 1)],
+    ],
+)
+def test_k_in_a_row_wins_in_every_direction(cells):
+    board = Board(size=5, win_length=4)
+    for row, col in cells[:-1]:
+        assert not board.edit_field("X", row, col)
+    assert board.edit_field("X", *cells[-1])
+    assert board.check_victory("X")
+    assert not board.check_victory("O")
+
+
+def test_lines_do_not_wrap_onto_the_next_row():
+    board = Board(size=4, win_length=3)
+    for row, col in [(1, 3), (1, 4), (2, 1)]:
+        assert not board.edit_field("X", row, col)
+    for row, col in [(3, 4), (4, 1), (4, 2)]:
+        assert not board.edit_field("O", row, col)
+    assert not board.check_victory("X") and not board.check_victory("O")
+
+
+def test_incremental_check_agrees_with_the_full_one():
+    rng = random.Random(7)
+    for size, win_length in [(3, 3), (5, 4), (8, 5), (MAX_SIZE, 5)]:
+        cells = [(row, col) for row in range(1, size + 1) for col in range(1, size + 1)]
+        for _ in range(50):
+            board = Board(size=size, win_length=win_length)
+            for turn, (row, col) in enumerate(rng.sample(cells, len(cells))):
+                symbol = SYMBOLS[turn % 2]
+                won = board.edit_field(symbol, row, col)
+                assert won == board.check_victory(symbol)
+                if won:
+                    break
+
+
+def test_bad_moves_are_refused():
+    board = Board(size=4, win_length=3)
+    board.edit_field("X", 4, 4)
+    with pytest.raises(InvalidPlay):
+        board.edit_field("O", 4, 4)
+    for row, col in [(0, 1), (1, 5)]:
+        with pytest.raises(IncorrectInput):
+            board.edit_field("O", row, col)
+
+
+async def test_large_room_is_played_to_a_win(client, create_player):
+    first, second = await create_player("first"), await create_player("second")
+    response = await client.post(
+        "/rooms", json={"player_id": first, "size": 6, "win_length": 4}
+    )
+    assert response.status_code == 201
+    room_id = response.json()
+    await client.put(f"/rooms/{room_id}/players/add", json={"player_id": second})
+    for player_id, row, col in [
+        (first, 3, 3),
+        (second, 1, 1),
+        (first, 4, 4),
+        (second, 1, 2),
+        (first, 5, 5),
+        (second, 1, 3),
+        (first, 6, 6),
+    ]:
+        response = await client.put(
+            f"/rooms/{room_id}/board",
+            json={"player_id": player_id, "row": row, "col": col},
+        )
+        assert response.status_code == 200
+    board = response.json()
+    assert len(board) == 6 and all(len(row) == 6 for row in board)
+    assert [board[i][i] for i in range(2, 6)] == ["X"] * 4
+    response = await client.get(f"/rooms/{room_id}/board")
+    assert response.json() == first
+
+
+@pytest.mark.parametrize(
+    "size, win_length, status_code",
+    [(4, 5, 406), (MAX_SIZE + 1, 3, 422), (3, 2, 422)],
+)
+async def test_room_geometry_is_validated(
+    client, create_player, size, win_length, status_code
+):
+    player_id = await create_player()
+    response = await client.post(
+        "/rooms", json={"player_id": player_id, "size": size, "win_length": win_length}
+    )
+    assert response.status_code == status_code
@@ -0,0 +1,69 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.cache import RoomCache, room_cache
+from app.db import Session
+from app.models.move import Move
+from app.models.room import Room
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def cache(monkeypatch) -> tuple[RoomCache, list, asyncio.Event]:
+    """A separate cache whose loads count themselves and wait for a go"""
+    cache = RoomCache()
+    loads: list[list[uuid.UUID]] = []
+    go = asyncio.Event()
+    load_many = cache._load_many
+
+    async def gated(room_ids: list[uuid.UUID]) -> list[Room]:
+        loads.append(room_ids)
+        await go.wait()
+        return await load_many(room_ids)
+
+    monkeypatch.setattr(cache, "_load_many", gated)
+    return cache, loads, go
+
+
+async def test_concurrent_misses_share_one_load(room, cache):
+    cache, loads, go = cache
+    room_id = uuid.UUID(room[0])
+    waiting = [asyncio.ensure_future(cache.get(room_id)) for _ in range(3)]
+    await asyncio.sleep(0)
+    go.set()
+    rooms = await asyncio.gather(*waiting)
+    assert len(loads) == 1
+    assert rooms[0] is rooms[1] is rooms[2]
+    assert rooms[0].room_id == room_id
+
+
+async def test_cancelled_waiter_does_not_cancel_the_load(room, cache):
+    cache, _, go = cache
+    room_id = uuid.UUID(room[0])
+    first = asyncio.ensure_future(cache.get(room_id))
+    second = asyncio.ensure_future(cache.get(room_id))
+    await asyncio.sleep(0)
+    first.cancel()
+    go.set()
+    assert (await second).room_id == room_id
+    assert room_id in cache
+
+
+async def test_moves_are_written_back_on_flush(client, room):
+    room_id, first, _ = room
+    response = await client.put(
+        f"/rooms/{room_id}/board", json={"player_id": first, "row": 2, "col": 2}
+    )
+    assert response.status_code == 200
+    await room_cache.flush()
+    async with Session() as session:
+        stored = await session.get(Room, uuid.UUID(room_id))
+        moves = await session.execute(
+            select(Move.ply, Move.cell).where(Move.room_id == uuid.UUID(room_id))
+        )
+        assert stored.move_count == 1
+        assert moves.all() == [(1, 4)]
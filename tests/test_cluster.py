@@ -0,0 +1,91 @@
+import uuid
+
+from fastapi import FastAPI
+import httpx
+import pytest
+
+from app.dispatch import Dispatcher, HashRing
+from app.leaderboard import leaderboard
+from app.routers import cluster
+
+pytestmark = pytest.mark.anyio
+
+SECRET = "test-secret"
+
+
+@pytest.fixture
+async def worker(app, monkeypatch):
+    """A client for the cluster router as mounted on an app.dispatch worker"""
+    monkeypatch.setattr(cluster, "CLUSTER_SECRET", SECRET)
+    worker_app = FastAPI()
+    worker_app.include_router(cluster.router)
+    transport = httpx.ASGITransport(app=worker_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def test_not_mounted_outside_a_cluster(client):
+    assert (await client.post("/cluster/release")).status_code == 404
+
+
+async def test_requires_the_secret(worker):
+    assert (await worker.post("/cluster/release")).status_code == 403
+    response = await worker.post(
+        "/cluster/release", headers={"X-Cluster-Secret": "wrong"}
+    )
+    assert response.status_code == 403
+    response = await worker.post(
+        "/cluster/release", headers={"X-Cluster-Secret": SECRET}
+    )
+    assert response.status_code == 204
+
+
+async def test_results_of_unknown_players_are_ignored(worker, create_player):
+    first = await create_player("first")
+    second = await create_player("second")
+    stranger = str(uuid.uuid4())
+    response = await worker.post(
+        "/cluster/results",
+        headers={"X-Cluster-Secret": SECRET},
+        json=[
+            {
+                "first_player_id": first,
+                "second_player_id": stranger,
+                "winner_player_id": first,
+            },
+            {
+                "first_player_id": first,
+                "second_player_id": second,
+                "winner_player_id": stranger,
+            },
+            {
+                "first_player_id": first,
+                "second_player_id": second,
+                "winner_player_id": first,
+            },
+        ],
+    )
+    assert response.status_code == 204
+    assert leaderboard.get(uuid.UUID(stranger)) is None
+    stats = leaderboard.get(uuid.UUID(first))
+    assert (stats.wins, stats.losses) == (1, 0)
+    assert leaderboard.get(uuid.UUID(second)).losses == 1
+
+
+def test_ring_moves_a_share_of_keys_to_a_new_node():
+    keys = [uuid.uuid4().bytes for _ in range(2000)]
+    ring = HashRing(["a", "b", "c"])
+    before = {key: ring.node_for(key) for key in keys}
+    ring.add("d")
+    moved = [key for key in keys if ring.node_for(key) != before[key]]
+    assert all(ring.node_for(key) == "d" for key in moved)
+    assert 0.15 < len(moved) / len(keys) < 0.35
+
+
+def test_dispatcher_routes_rooms_by_ring():
+    dispatcher = Dispatcher(["http://one", "http://two"], SECRET)
+    room_id = uuid.uuid4()
+    owner = dispatcher.worker_for(f"/rooms/{room_id}/board")
+    assert owner == dispatcher.worker_for(f"/rooms/{room_id}/moves")
+    assert dispatcher.worker_for("/leaderboard") == "http://one"
+    assert dispatcher.worker_for("/rooms/not-a-room/board") == "http://one"
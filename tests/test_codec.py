@@ -0,0 +1,30 @@
+import random
+
+import pytest
+
+from app.board import MAX_SIZE, Board
+from app.codec import SYMBOLS, decode_board, encode_board
+
+
+def random_board(rng: random.Random, size: int, win_length: int) -> Board:
+    board = Board(size=size, win_length=win_length)
+    cells = [(row, col) for row in range(1, size + 1) for col in range(1, size + 1)]
+    for turn, (row, col) in enumerate(rng.sample(cells, rng.randrange(len(cells)))):
+        board.edit_field(SYMBOLS[turn % 2], row, col)
+    return board
+
+
+@pytest.mark.parametrize("size", range(3, MAX_SIZE + 1))
+def test_codec_round_trip(size):
+    rng = random.Random(size)
+    assert encode_board(Board(size=size, win_length=3)) == b""
+    for _ in range(20):
+        board = random_board(rng, size, 3)
+        data = encode_board(board)
+        if board.occupied:
+            assert len(data) == 2 * ((size * size + 7) // 8)
+        decoded = decode_board(data, size, 3)
+        assert decoded.fields == board.fields
+        assert [decoded.mask(symbol) for symbol in SYMBOLS] == [
+            board.mask(symbol) for symbol in SYMBOLS
+        ]
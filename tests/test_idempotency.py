@@ -0,0 +1,73 @@
+import asyncio
+import uuid
+
+from fastapi import HTTPException
+import pytest
+
+from app.idempotency import IdempotencyStore
+
+pytestmark = pytest.mark.anyio
+
+
+async def play(client, room_id, player_id, row, col, request_id):
+    return await client.put(
+        f"/rooms/{room_id}/board",
+        json={
+            "player_id": player_id,
+            "row": row,
+            "col": col,
+            "request_id": str(request_id),
+        },
+    )
+
+
+async def test_retried_move_is_applied_once(client, room):
+    room_id, first, second = room
+    request_id = uuid.uuid4()
+    responses = await asyncio.gather(
+        *(play(client, room_id, first, 1, 1, request_id) for _ in range(3))
+    )
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.content for response in responses}) == 1
+
+    await play(client, room_id, second, 2, 2, uuid.uuid4())
+    # A late retry replays the original board instead of failing on a taken cell
+    response = await play(client, room_id, first, 1, 1, request_id)
+    assert (response.status_code, response.content) == (200, responses[0].content)
+    response = await client.get(f"/rooms/{room_id}/moves")
+    assert len(response.json()) == 2
+
+
+async def test_rejected_move_is_replayed_as_rejected(client, room):
+    room_id, first, second = room
+    request_id = uuid.uuid4()
+    response = await play(client, room_id, second, 1, 1, request_id)
+    assert response.status_code == 403
+    await play(client, room_id, first, 3, 3, uuid.uuid4())
+    response = await play(client, room_id, second, 1, 1, request_id)
+    assert response.status_code == 403
+    # Only the retry is refused, a new request for the same move goes through
+    response = await play(client, room_id, second, 1, 1, uuid.uuid4())
+    assert response.status_code == 200
+    response = await client.get(f"/rooms/{room_id}/moves")
+    assert len(response.json()) == 2
+
+
+async def test_unexpected_failure_is_not_remembered():
+    store = IdempotencyStore()
+    calls = []
+
+    async def fail() -> str:
+        calls.append(None)
+        raise RuntimeError
+
+    async def reject() -> str:
+        calls.append(None)
+        raise HTTPException(status_code=400)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await store.run("failed", fail)
+        with pytest.raises(HTTPException):
+            await store.run("rejected", reject)
+    assert len(calls) == 3
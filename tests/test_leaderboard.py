@@ -0,0 +1,72 @@
+import uuid
+
+import pytest
+
+from app.leaderboard import K_FACTOR, Leaderboard
+from app.models.stats import INITIAL_RATING
+
+pytestmark = pytest.mark.anyio
+
+
+def test_record_moves_ratings_by_elo():
+    board = Leaderboard()
+    first, second, third = sorted(uuid.uuid4() for _ in range(3))
+    board.record(first, second, first)
+    winner, loser = board.get(first), board.get(second)
+    assert (winner.wins, winner.losses, loser.wins, loser.losses) == (1, 0, 0, 1)
+    assert winner.rating == INITIAL_RATING + K_FACTOR / 2
+    assert loser.rating == INITIAL_RATING - K_FACTOR / 2
+
+    board.record(second, third, None)
+    drawn = board.get(third)
+    assert (drawn.draws, board.get(second).draws) == (1, 1)
+    # The lower rated player gains from a draw
+    assert drawn.rating < INITIAL_RATING
+    assert board.get(second).rating > INITIAL_RATING - K_FACTOR / 2
+    assert [stats.player_id for stats in board.top(3)] == [first, third, second]
+    assert [board.rank(board.get(player_id)) for player_id in (first, third)] == [1, 2]
+    assert [stats.player_id for stats in board.top(1, offset=2)] == [second]
+
+
+async def test_checkpoint_is_loaded_back(app, create_player):
+    first, second = [uuid.UUID(await create_player(name)) for name in ("a", "b")]
+    board = Leaderboard()
+    board.record(first, second, second)
+    await board.checkpoint()
+
+    restored = Leaderboard()
+    await restored.load()
+    assert restored.get(second) == board.get(second)
+    assert restored.get(first) == board.get(first)
+
+    # Rows that already exist are updated in place
+    restored.record(first, second, first)
+    await restored.checkpoint()
+    await board.load()
+    assert (board.get(first).wins, board.get(first).losses) == (1, 1)
+    assert board.get(first).rating == restored.get(first).rating
+
+
+async def test_finished_game_is_ranked(client, room):
+    room_id, first, second = room
+    for player_id, row, col in [
+        (first, 1, 1),
+        (second, 2, 1),
+        (first, 1, 2),
+        (second, 2, 2),
+        (first, 1, 3),
+    ]:
+        response = await client.put(
+            f"/rooms/{room_id}/board",
+            json={"player_id": player_id, "row": row, "col": col},
+        )
+        assert response.status_code == 200
+
+    response = await client.get(f"/players/{first}/stats")
+    assert response.status_code == 200
+    stats = response.json()
+    assert (stats["wins"], stats["losses"]) == (1, 0)
+    response = await client.get("/leaderboard", params={"limit": 100})
+    ranked = {row["player_id"]: row for row in response.json()}
+    assert ranked[first]["rank"] < ranked[second]["rank"]
+    assert ranked[first]["rating"] == stats["rating"] > ranked[second]["rating"]
@@ -0,0 +1,29 @@
+import pytest
+
+from app.exc import LeaseTaken
+from app.lease import RoomLease
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("shared", [False, True])
+async def test_second_owner_is_refused(app, shared):
+    # The application under test already holds the lease exclusively
+    with pytest.raises(LeaseTaken):
+        await RoomLease(shared=shared).acquire()
+
+
+async def test_dispatcher_workers_share_the_lease(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "app.lease.DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path}/shared.db"
+    )
+    workers = [RoomLease(shared=True) for _ in range(2)]
+    for lease in workers:
+        await lease.acquire()
+    with pytest.raises(LeaseTaken):
+        await RoomLease(shared=False).acquire()
+    for lease in workers:
+        await lease.release()
+    standalone = RoomLease(shared=False)
+    await standalone.acquire()
+    await standalone.release()
@@ -0,0 +1,11 @@
+import pytest
+
+from bench.loadtest import percentile
+
+
+@pytest.mark.parametrize(
+    "count, fraction, rank",
+    [(102, 0.5, 51), (20, 0.95, 19), (10, 0.5, 5), (1, 0.99, 1), (100, 1.0, 100)],
+)
+def test_percentile_is_nearest_rank(count, fraction, rank):
+    assert percentile([float(i) for i in range(1, count + 1)], fraction) == rank
@@ -0,0 +1,85 @@
+import uuid
+
+import pytest
+
+from app.leaderboard import Stats, leaderboard
+from app.matchmaking import MatchmakingQueue
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("app.matchmaking.time.monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def queue(monkeypatch, clock):
+    queue = MatchmakingQueue(ttl=30)
+    monkeypatch.setattr("app.routers.matchmaking.matchmaking_queue", queue)
+    return queue
+
+
+def test_players_who_stop_polling_leave_the_queue(clock):
+    queue = MatchmakingQueue(ttl=30)
+    idle, polling = uuid.uuid4(), uuid.uuid4()
+    queue.push(idle, 1500)
+    queue.push(polling, 1500)
+    clock[0] = 20
+    assert queue.touch(polling)
+    clock[0] = 40
+    assert not queue.touch(idle)
+    assert queue.pop_opponent(1500) == (polling, 1500)
+    assert queue.pop_opponent(1500) is None
+
+
+def test_found_rooms_are_handed_out_once_or_dropped(clock):
+    queue = MatchmakingQueue(ttl=30)
+    collected, abandoned, room_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    queue.set_match(collected, room_id)
+    queue.set_match(abandoned, room_id)
+    assert queue.pop_match(collected) == room_id
+    assert queue.pop_match(collected) is None
+    clock[0] = 31
+    assert queue.pop_match(abandoned) is None
+
+
+async def test_players_are_paired_into_a_room(client, create_player, queue):
+    first, second = await create_player("first"), await create_player("second")
+    response = await client.post("/matchmaking/enqueue", json={"player_id": first})
+    assert response.status_code == 202
+    response = await client.get(f"/matchmaking/{first}")
+    assert response.status_code == 202
+
+    response = await client.post("/matchmaking/enqueue", json={"player_id": second})
+    assert response.status_code == 201
+    room_id = response.json()["room_id"]
+    response = await client.get(f"/matchmaking/{first}")
+    assert (response.status_code, response.json()["room_id"]) == (200, room_id)
+    response = await client.get(f"/matchmaking/{first}")
+    assert response.status_code == 404
+
+    response = await client.get(f"/rooms/{room_id}/players")
+    assert response.status_code == 200
+
+
+async def test_rating_comes_from_the_leaderboard(
+    client, create_player, queue, monkeypatch
+):
+    first, second = await create_player("first"), await create_player("second")
+    strong = Stats(uuid.UUID(second), wins=20, rating=1900.0)
+    monkeypatch.setattr(
+        leaderboard,
+        "get",
+        lambda player_id: strong if player_id == strong.player_id else None,
+    )
+    response = await client.post("/matchmaking/enqueue", json={"player_id": first})
+    assert response.status_code == 202
+    # A rating sent by the client is not trusted
+    response = await client.post(
+        "/matchmaking/enqueue", json={"player_id": second, "rating": 1500}
+    )
+    assert response.status_code == 202
+    assert queue.remove(uuid.UUID(first)) and queue.remove(uuid.UUID(second))
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from app.hub import hub
+
+pytestmark = pytest.mark.anyio
+
+
+class WebSocketClient:
+    """Drives the app's WebSocket route over ASGI on the test event loop"""
+
+    def __init__(self, app, path: str) -> None:
+        self._incoming: asyncio.Queue[dict] = asyncio.Queue()
+        self._outgoing: asyncio.Queue[dict] = asyncio.Queue()
+        scope = {
+            "type": "websocket",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "headers": [],
+            "scheme": "ws",
+            "server": ("test", 80),
+            "client": ("127.0.0.1", 1234),
+            "subprotocols": [],
+            "app": app,
+        }
+        self._incoming.put_nowait({"type": "websocket.connect"})
+        self.task = asyncio.ensure_future(
+            app(scope, self._incoming.get, self._outgoing.put)
+        )
+
+    async def receive(self) -> dict:
+        return await asyncio.wait_for(self._outgoing.get(), 5)
+
+    async def receive_json(self) -> dict:
+        message = await self.receive()
+        assert message["type"] == "websocket.send", message
+        return json.loads(message["text"])
+
+    def disconnect(self) -> None:
+        self._incoming.put_nowait({"type": "websocket.disconnect", "code": 1001})
+
+
+async def test_release_disconnects_subscribers(app, room):
+    room_id, _, _ = room
+    websocket = WebSocketClient(app, f"/rooms/{room_id}/ws")
+    assert (await websocket.receive())["type"] == "websocket.accept"
+    await websocket.receive_json()
+    assert hub.has_subscribers(uuid.UUID(room_id))
+
+    hub.close_all()
+    message = await websocket.receive()
+    assert message == {"type": "websocket.close", "code": 1012, "reason": ""}
+    await asyncio.wait_for(websocket.task, 5)
+    assert not hub.has_subscribers(uuid.UUID(room_id))
+
+
+WINNING_GAME = [(0, 1, 1), (1, 2, 1), (0, 1, 2), (1, 2, 2), (0, 1, 3)]
+
+
+async def play(client, room_id, players, moves=WINNING_GAME):
+    for seat, row, col in moves:
+        response = await client.put(
+            f"/rooms/{room_id}/board",
+            json={"player_id": players[seat], "row": row, "col": col},
+        )
+        assert response.status_code == 200
+
+
+async def subscribed(room_id: str) -> None:
+    while not hub.has_subscribers(uuid.UUID(room_id)):
+        await asyncio.sleep(0.01)
+
+
+async def test_websocket_streams_the_game_until_it_ends(app, client, room):
+    room_id, first, second = room
+    websocket = WebSocketClient(app, f"/rooms/{room_id}/ws")
+    assert (await websocket.receive())["type"] == "websocket.accept"
+    snapshot = await websocket.receive_json()
+    assert snapshot == {"board": [[" "] * 3] * 3, "result": "YES"}
+
+    await play(client, room_id, (first, second))
+    updates = [await websocket.receive_json() for _ in WINNING_GAME]
+    assert [update["board"][0][0] for update in updates] == ["X"] * 5
+    assert [update["result"] for update in updates] == ["YES"] * 4 + [first]
+    message = await websocket.receive()
+    assert message == {"type": "websocket.close", "code": 1000, "reason": ""}
+    await asyncio.wait_for(websocket.task, 5)
+    assert not hub.has_subscribers(uuid.UUID(room_id))
+
+
+async def test_websocket_disconnect_unsubscribes(app, room):
+    room_id, _, _ = room
+    websocket = WebSocketClient(app, f"/rooms/{room_id}/ws")
+    assert (await websocket.receive())["type"] == "websocket.accept"
+    await websocket.receive_json()
+    websocket.disconnect()
+    await asyncio.wait_for(websocket.task, 5)
+    assert not hub.has_subscribers(uuid.UUID(room_id))
+
+
+async def test_websocket_to_unknown_room_is_refused(app):
+    room_id = uuid.uuid4()
+    websocket = WebSocketClient(app, f"/rooms/{room_id}/ws")
+    message = await websocket.receive()
+    assert message == {"type": "websocket.close", "code": 1008, "reason": ""}
+    await asyncio.wait_for(websocket.task, 5)
+    assert not hub.has_subscribers(room_id)
+
+
+async def test_sse_streams_the_game_until_it_ends(client, room):
+    room_id, first, second = room
+    # The test transport returns the body once the stream is over
+    events = asyncio.ensure_future(client.get(f"/rooms/{room_id}/events"))
+    await asyncio.wait_for(subscribed(room_id), 5)
+    await play(client, room_id, (first, second))
+    response = await asyncio.wait_for(events, 5)
+    assert response.headers["content-type"].startswith("text/event-stream")
+    messages = [
+        json.loads(event.removeprefix("data: "))
+        for event in response.text.split("\n\n")
+        if event
+    ]
+    assert [message["result"] for message in messages] == ["YES"] * 5 + [first]
+    assert not hub.has_subscribers(uuid.UUID(room_id))
+
+
+async def test_sse_ends_on_release(client, room):
+    room_id, _, _ = room
+    events = asyncio.ensure_future(client.get(f"/rooms/{room_id}/events"))
+    await asyncio.wait_for(subscribed(room_id), 5)
+    hub.close_all()
+    response = await asyncio.wait_for(events, 5)
+    assert response.text.count("data: ") == 1
+    response = await client.get(f"/rooms/{uuid.uuid4()}/events")
+    assert response.status_code == 404
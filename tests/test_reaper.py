@@ -0,0 +1,86 @@
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app.analytics import evaluate_rooms
+from app.cache import room_cache
+from app.db import Session
+from app.models.archive import ArchivedRoom
+from app.models.move import Move
+from app.models.room import Room
+from app.reaper import Reaper
+
+pytestmark = pytest.mark.anyio
+
+
+async def play(client, room_id, moves):
+    for player_id, row, col in moves:
+        response = await client.put(
+            f"/rooms/{room_id}/board",
+            json={"player_id": player_id, "row": row, "col": col},
+        )
+        assert response.status_code == 200
+
+
+async def count(model, room_id: str) -> int:
+    async with Session() as session:
+        result = await session.execute(
+            select(func.count()).where(model.room_id == uuid.UUID(room_id))
+        )
+        return result.scalar()
+
+
+async def test_finished_games_stay_readable_once_archived(client, room):
+    room_id, first, second = room
+    await play(
+        client,
+        room_id,
+        [(first, 1, 1), (second, 2, 1), (first, 1, 2), (second, 2, 2), (first, 1, 3)],
+    )
+    await room_cache.release()
+    await Reaper(ttl=-5, pause=0).reap()
+    assert await count(Room, room_id) == 0
+    assert await count(ArchivedRoom, room_id) == 1
+
+    assert (await client.get(f"/rooms/{room_id}/board")).json() == first
+    players = (await client.get(f"/rooms/{room_id}/players")).json()
+    assert [(player["player_id"], player["symbol"]) for player in players] == [
+        (first, "X"),
+        (second, "O"),
+    ]
+    assert len((await client.get(f"/rooms/{room_id}/moves")).json()) == 5
+    evaluated = [
+        room_id
+        for room_ids, _ in [page async for page in evaluate_rooms()]
+        for room_id in room_ids
+    ]
+    assert uuid.UUID(room_id) in evaluated
+
+
+async def test_abandoned_games_are_deleted_with_their_moves(client, room):
+    room_id, first, _ = room
+    await play(client, room_id, [(first, 1, 1)])
+    await room_cache.release()
+    await Reaper(ttl=-5, pause=0).reap()
+    assert await count(Room, room_id) == 0
+    assert await count(Move, room_id) == 0
+    assert (await client.get(f"/rooms/{room_id}/board")).status_code == 404
+
+
+async def test_cached_rooms_do_not_stall_the_next_pages(client, create_player):
+    player_id = await create_player()
+    room_ids = [
+        (await client.post("/rooms", json={"player_id": player_id})).json()
+        for _ in range(4)
+    ]
+    await room_cache.release()
+    cached = sorted(room_ids)[:2]
+    for room_id in cached:
+        await room_cache.get(uuid.UUID(room_id))
+    try:
+        await Reaper(ttl=-5, batch_size=2, pause=0).reap()
+        remaining = [room_id for room_id in room_ids if await count(Room, room_id)]
+        assert sorted(remaining) == cached
+    finally:
+        await room_cache.release()
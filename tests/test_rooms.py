@@ -0,0 +1,79 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def play(client, room_id: str, player_id: str, row: int, col: int):
+    return await client.put(
+        f"/rooms/{room_id}/board",
+        json={"player_id": player_id, "row": row, "col": col},
+    )
+
+
+async def test_game_until_win(client, room):
+    room_id, first, second = room
+
+    response = await client.get(f"/rooms/{room_id}/players")
+    assert response.status_code == 200
+    assert [(player["player_id"], player["symbol"]) for player in response.json()] == [
+        (first, "X"),
+        (second, "O"),
+    ]
+
+    for player_id, row, col in [
+        (first, 1, 1),
+        (second, 2, 1),
+        (first, 1, 2),
+        (second, 2, 2),
+    ]:
+        assert (await play(client, room_id, player_id, row, col)).status_code == 200
+        assert (await client.get(f"/rooms/{room_id}/board")).json() == "YES"
+
+    response = await play(client, room_id, first, 1, 3)
+    assert response.status_code == 200
+    assert response.json() == [["X", "X", "X"], ["O", "O", " "], [" ", " ", " "]]
+    assert (await client.get(f"/rooms/{room_id}/board")).json() == first
+
+    response = await client.get(f"/rooms/{room_id}/moves")
+    assert [(move["row"], move["col"]) for move in response.json()] == [
+        (1, 1),
+        (2, 1),
+        (1, 2),
+        (2, 2),
+        (1, 3),
+    ]
+
+
+async def test_move_out_of_turn(client, room):
+    room_id, _, second = room
+    assert (await play(client, room_id, second, 1, 1)).status_code == 403
+
+
+async def test_move_on_taken_cell(client, room):
+    room_id, first, second = room
+    assert (await play(client, room_id, first, 1, 1)).status_code == 200
+    assert (await play(client, room_id, second, 1, 1)).status_code == 400
+
+
+async def test_join_full_room(client, room, create_player):
+    room_id, _, _ = room
+    third = await create_player("third")
+    response = await client.put(
+        f"/rooms/{room_id}/players/add", json={"player_id": third}
+    )
+    assert response.status_code == 406
+
+
+async def test_unknown_room(client, create_player):
+    player_id = await create_player()
+    room_id = "00000000-0000-0000-0000-000000000000"
+    assert (await client.get(f"/rooms/{room_id}/board")).status_code == 404
+    assert (await play(client, room_id, player_id, 1, 1)).status_code == 404
+
+
+async def test_move_before_second_player_joins(client, create_player):
+    first = await create_player("first")
+    room_id = (await client.post("/rooms", json={"player_id": first})).json()
+    response = await play(client, room_id, first, 1, 1)
+    assert response.status_code == 400
+    assert (await client.get(f"/rooms/{room_id}/board")).json() == "YES"